@@ -9,8 +9,11 @@ import sys
 import pandas as pd
 import yaml
 from datetime import datetime
-import shutil
 from utils.logger import get_logger
+from utils.archive_store import write_archive_part, commit_archive_part
+from utils.schema import apply_schema
+from utils.file_io import validate_file_format, read_files, concatenate_frames
+from utils.validation import validate_required_columns
 
 # Timestamp for the entire script
 INGESTION_TIMESTAMP = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
@@ -26,40 +29,13 @@ def load_config(config_path):
         config = yaml.safe_load(f)
     return config
 
-def validate_file_format(file_name, expected_pattern):
-    """Validate if a file matches the expected pattern."""
-    return file_name.startswith(expected_pattern.split("*")[0]) and file_name.endswith(".json")
-
-def read_file(file_path, file_format):
-    """Read a file in the specified format."""
-    if file_format == "json":
-        return pd.read_json(file_path)
-    else:
-        raise ValueError(f"Unsupported file format: {file_format}")
-
 def write_file(data, file_path, file_format):
     """Write a DataFrame to a file in the specified format."""
     if file_format == "json":
-        data.to_json(file_path, orient="records", indent=4)
+        data.to_json(file_path, orient="records", indent=4, date_format="iso")
     else:
         raise ValueError(f"Unsupported file format: {file_format}")
 
-def concatenate_files(file_paths, file_format):
-    """Concatenate multiple files into a single DataFrame."""
-    dataframes = []
-    for file_path in file_paths:
-        df = read_file(file_path, file_format)
-        dataframes.append(df)
-    return pd.concat(dataframes, ignore_index=True)
-
-def validate_required_columns(data, required_columns, dataset_name):
-    """Validate that all required columns are present in the dataset."""
-    missing_columns = [col for col in required_columns if col not in data.columns]
-    if missing_columns:
-        logger.error(f"Missing columns in {dataset_name}: {missing_columns}")
-        raise ValueError(f"Missing columns in {dataset_name}: {missing_columns}")
-    logger.info(f"All required columns present in {dataset_name}.")
-
 def validate_negative_values(data, columns_to_check, dataset_name):
     """Validate that no negative values exist in the specified columns."""
     for col in columns_to_check:
@@ -75,15 +51,6 @@ def validate_unique_ids(data, unique_id_column, dataset_name):
         raise ValueError(f"Duplicate IDs found in column '{unique_id_column}' of {dataset_name}.")
     logger.info(f"All IDs are unique in column '{unique_id_column}' of {dataset_name}.")
 
-def move_files(files, destination):
-    """Move files to a new destination with a timestamp appended to filenames."""
-    for file in files:
-        base_name = os.path.basename(file)
-        new_name = f"{os.path.splitext(base_name)[0]}_{os.path.splitext(base_name)[1]}"
-        destination_path = os.path.join(destination, new_name)
-        shutil.move(file, destination_path)
-        logger.info(f"Moved file {file} to {destination_path}")
-
 def main():
     global logger
     logger = get_logger("a101_ingestion_sales_product")
@@ -94,6 +61,7 @@ def main():
     directories = config["directories"]
     data_format = config["data_format"]
     validation = config["validation"]
+    schema = config["schema"]
 
     input_dir = directories["input"]
     bronze_dir = directories["bronze"]
@@ -116,24 +84,33 @@ def main():
     logger.info(f"Found sales files: {sales_files}")
     logger.info(f"Found product files: {product_files}")
 
-    # Concatenate files if there are multiple
-    sales_format = data_format["input"]["sales"]
-    product_format = data_format["input"]["product"]
-    if len(sales_files) > 1:
+    # Read the files, keeping their content for the archive, and concatenate them if there are multiple
+    sales_frames = read_files(sales_files, data_format["input"]["sales"])
+    product_frames = read_files(product_files, data_format["input"]["product"])
+    if len(sales_frames) > 1:
         logger.info("Concatenating sales files.")
-        sales_data = concatenate_files(sales_files, sales_format)
-    else:
-        sales_data = read_file(sales_files[0], sales_format)
+    sales_data = concatenate_frames(sales_frames)
 
-    if len(product_files) > 1:
+    if len(product_frames) > 1:
         logger.info("Concatenating product files.")
-        product_data = concatenate_files(product_files, product_format)
-    else:
-        product_data = read_file(product_files[0], product_format)
+    product_data = concatenate_frames(product_frames)
+
+    # Archive the files as read before writing bronze. The parts stay invisible and
+    # the input files in place until bronze is written, so a failure in between
+    # cannot ingest the batch twice.
+    archive_config = config["archive"]
+    ingestion = {"ingestion_timestamp": INGESTION_TIMESTAMP}
+    label = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    sales_part = write_archive_part(sales_frames, archive_dir, "sales", archive_config, label, extra=ingestion)
+    product_part = write_archive_part(product_frames, archive_dir, "product", archive_config, label, extra=ingestion)
+
+    # Enforce the configured dtypes
+    sales_data = apply_schema(sales_data, schema["sales"], logger)
+    product_data = apply_schema(product_data, schema["product"], logger)
 
     # Perform validations
-    validate_required_columns(sales_data, validation["required_columns"]["sales"], "sales data")
-    validate_required_columns(product_data, validation["required_columns"]["product"], "product data")
+    validate_required_columns(sales_data, validation["required_columns"]["sales"], "sales data", logger)
+    validate_required_columns(product_data, validation["required_columns"]["product"], "product data", logger)
 
     # Add ingestion timestamp
     logger.info("Adding ingestion timestamp.")
@@ -151,9 +128,10 @@ def main():
     logger.info(f"Sales data saved to bronze: {sales_bronze_path}")
     logger.info(f"Product data saved to bronze: {product_bronze_path}")
 
-    # Archive processed files
+    # Commit the archive parts, which deletes the input files
     logger.info("Archiving processed files.")
-    move_files(sales_files + product_files, archive_dir)
+    commit_archive_part(archive_dir, *sales_part, [file for file, _ in sales_frames], logger)
+    commit_archive_part(archive_dir, *product_part, [file for file, _ in product_frames], logger)
 
     logger.info("Ingestion completed successfully.")
 
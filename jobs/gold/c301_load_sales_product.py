@@ -5,6 +5,9 @@ import yaml
 import shutil
 from datetime import datetime
 from utils.logger import get_logger
+from utils.schema import apply_schema
+from utils.parquet_manifest import manifest_lock
+from utils.gold_tables import list_silver_files, resolve_backfill_swaps, create_or_update_view
 
 # Initialize logger
 logger = get_logger("c301_load_sales_product")
@@ -14,27 +17,28 @@ def load_config(config_file):
     with open(config_file, "r") as file:
         return yaml.safe_load(file)
 
-def load_silver_data(silver_dir, file_format):
+def load_silver_data(silver_dir, file_format, success_marker, schema):
     """Load and concatenate data from the silver layer."""
-    files = [os.path.join(silver_dir, f) for f in os.listdir(silver_dir) if f.endswith(file_format)]
+    files = list_silver_files(silver_dir, file_format, success_marker)
     if not files:
         logger.error("No files found in the silver directory.")
         exit(1)
     logger.info(f"Loading {len(files)} file(s) from silver directory.")
     dataframes = [pd.read_parquet(file) for file in files]
-    return pd.concat(dataframes, ignore_index=True), files
+    data = pd.concat(dataframes, ignore_index=True)
+    return apply_schema(data, schema, logger), files
 
 def create_and_load_staging_table(con, table_name, data):
     """Create a staging table in DuckDB and load data into it."""
     logger.info(f"Creating and loading staging table {table_name}.")
     
-    # Check if the table already exists and get the max id
-    try:
-        max_id = con.execute(f"SELECT MAX(id) FROM {table_name}").fetchone()[0]
-        if max_id is None:
-            max_id = 0
-    except duckdb.CatalogException:
-        # Table does not exist yet
+    # Check if the table already exists and get the max id. The catalog is queried
+    # instead of catching the error, which would abort the surrounding transaction.
+    table_exists = con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table_name]
+    ).fetchone()[0] > 0
+    max_id = con.execute(f"SELECT MAX(id) FROM {table_name}").fetchone()[0] if table_exists else None
+    if max_id is None:
         max_id = 0
 
     # Add an id column starting from max_id + 1
@@ -73,37 +77,29 @@ def create_monthly_tables(con, staging_table):
               AND EXTRACT(MONTH FROM sale_date) = {int(month)}
         """)
 
-def create_or_update_view(con):
-    """Create or update a view for the year 2024."""
-    logger.info("Creating or updating view for the year 2024.")
-    # Collect all table names for 2024
-    tables_2024 = con.execute("""
-        SELECT table_name FROM information_schema.tables
-        WHERE table_name LIKE 'sales_2024_%'
-    """).fetchall()
-
-    # Construct the query to join all 2024 tables
-    if tables_2024:
-        union_query = " UNION ALL ".join([f"SELECT * FROM {table[0]}" for table in tables_2024])
-
-        # Create or replace the view
-        con.execute(f"""
-            CREATE OR REPLACE VIEW vw_sales_2024 AS
-            {union_query}
-        """)
-        logger.info("View vw_sales_2024 created or updated successfully.")
-    else:
-        logger.warning("No tables found for the year 2024 to create the view.")
+def archive_files(files, archive_dir, timestamp, success_marker):
+    """Move files to an archive directory with a timestamp appended to filenames.
 
-def archive_files(files, archive_dir, timestamp):
-    """Move files to an archive directory with a timestamp appended to filenames."""
+    Partitions of a sharded run are prefixed with the run directory name, and the
+    run directory is removed once all its partitions have been archived.
+    """
+    run_dirs = set()
     for file in files:
         base_name = os.path.basename(file)
+        run_dir = os.path.dirname(file)
+        if os.path.exists(os.path.join(run_dir, success_marker)):
+            run_dirs.add(run_dir)
+            base_name = f"{os.path.basename(run_dir)}_{base_name}"
         new_name = f"{os.path.splitext(base_name)[0]}_{timestamp}{os.path.splitext(base_name)[1]}"
         destination = os.path.join(archive_dir, new_name)
         shutil.move(file, destination)
         logger.info(f"Archived file {file} to {destination}.")
 
+    for run_dir in run_dirs:
+        os.remove(os.path.join(run_dir, success_marker))
+        os.rmdir(run_dir)
+        logger.info(f"Removed sharded run directory {run_dir}.")
+
 def main():
     """Main script to load data into DuckDB."""
     # Load configuration
@@ -115,25 +111,42 @@ def main():
     # Load data from silver layer
     silver_dir = config["directories"]["silver"]
     file_format = config["input"]["file_format"]
-    data, files = load_silver_data(silver_dir, file_format)
-
-    # Connect to DuckDB
-    db_path = config["database"]["path"]
-    con = duckdb.connect(database=db_path, read_only=False)
-
-    # Load data into staging table
-    staging_table = config["tables"]["staging"]
-    create_and_load_staging_table(con, staging_table, data)
-
-    # Create separate tables for each sales month
-    create_monthly_tables(con, staging_table)
-
-    # Create or update view for 2024
-    create_or_update_view(con)
+    success_marker = config["input"]["success_marker"]
+    data, files = load_silver_data(silver_dir, file_format, success_marker, config["schema"])
 
-    # Archive processed files
+    # The load and the move into the archive hold the writer lock of the archive,
+    # so a backfill never sees silver files that are loaded but not archived yet
     archive_dir = os.path.join(silver_dir, "archive")
-    archive_files(files, archive_dir, timestamp)
+    os.makedirs(archive_dir, exist_ok=True)
+    with manifest_lock(archive_dir):
+        # Connect to DuckDB
+        db_path = config["database"]["path"]
+        con = duckdb.connect(database=db_path, read_only=False)
+
+        resolve_backfill_swaps(con, config["tables"]["backfills"], archive_dir, logger)
+
+        # Load every silver file, including all shards of a sharded run, in a single transaction
+        staging_table = config["tables"]["staging"]
+        con.begin()
+        try:
+            # Load data into staging table
+            create_and_load_staging_table(con, staging_table, data)
+
+            # Create separate tables for each sales month
+            create_monthly_tables(con, staging_table)
+
+            # Create or update view for 2024
+            create_or_update_view(con, logger)
+            con.commit()
+        except Exception:
+            con.rollback()
+            logger.error("Loading failed, rolled back the transaction.")
+            raise
+
+        con.close()
+
+        # Archive processed files
+        archive_files(files, archive_dir, timestamp, success_marker)
 
     logger.info("Data loading completed successfully.")
 
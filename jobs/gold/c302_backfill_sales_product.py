@@ -0,0 +1,353 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import duckdb
+import pandas as pd
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from utils.logger import get_logger
+from utils.schema import apply_schema, coerce_column, column_spec
+from utils.parquet_manifest import manifest_lock, begin_swap, commit_swap, abort_swap, list_live_files
+from utils.archive_store import SOURCE_COLUMN, read_index, select_files, read_archived_files
+from utils.validation import validate_required_columns
+from utils.sharding import init_worker, balance_files, transform_partitions
+from utils.gold_tables import list_silver_files, record_backfill, resolve_backfill_swaps, create_or_update_view
+
+# Initialize logger
+logger = get_logger("c302_backfill_sales_product")
+
+# Configuration file path
+CONFIG_PATH = "configs/gold/c302_backfill_sales_product.yml"
+
+def load_config(config_file):
+    """Load configuration from YAML file."""
+    with open(config_file, "r") as file:
+        return yaml.safe_load(file)
+
+def select_sales_files(index, start_date=None, end_date=None, from_file=None, to_file=None):
+    """Select the archived sales files to replay, by sale_date range or by source file name range.
+
+    A file range is widened to whole ingestion runs, since the gold layer replaces
+    the rows of a run as a unit.
+    """
+    if from_file is None and to_file is None:
+        return select_files(index, "sales", "sale_date", start_date, end_date)
+
+    names = [
+        name for name, entry in index["files"].items()
+        if entry["dataset"] == "sales" and (from_file is None or name >= from_file) and (to_file is None or name <= to_file)
+    ]
+    runs = {index["files"][name].get("ingestion_timestamp") for name in names}
+    return {
+        name: entry for name, entry in index["files"].items()
+        if entry["dataset"] == "sales" and entry.get("ingestion_timestamp") in runs
+    }
+
+def read_product_data(archive_dir, index, sales_selected):
+    """Read the product data ingested with the selected sales files, keeping the latest row per product."""
+    runs = {entry.get("ingestion_timestamp") for entry in sales_selected.values()}
+    selected = {
+        name: entry for name, entry in select_files(index, "product").items()
+        if entry.get("ingestion_timestamp") in runs
+    } or select_files(index, "product")
+    dataframes = []
+    for archive in sorted({entry["archive"] for entry in selected.values()}):
+        names = [name for name, entry in selected.items() if entry["archive"] == archive]
+        dataframes.append(read_archived_files(archive_dir, archive, names))
+    data = pd.concat(dataframes, ignore_index=True)
+    data["ingestion_timestamp"] = data[SOURCE_COLUMN].map(
+        {name: entry.get("ingestion_timestamp") for name, entry in selected.items()}
+    )
+    data = data.sort_values("ingestion_timestamp", kind="mergesort")
+    return data.drop(columns=[SOURCE_COLUMN]).drop_duplicates("product_id", keep="last", ignore_index=True)
+
+def filter_date_range(data, start_date=None, end_date=None):
+    """Keep the rows whose sale_date falls in [start_date, end_date].
+
+    Bronze keeps sale_date as read, so it is parsed here without changing the data.
+    """
+    sale_dates = pd.to_datetime(data["sale_date"], errors="coerce")
+    in_range = pd.Series(True, index=data.index)
+    if start_date is not None:
+        in_range &= sale_dates >= pd.Timestamp(start_date)
+    if end_date is not None:
+        in_range &= sale_dates <= pd.Timestamp(end_date)
+    return data[in_range]
+
+def replaced_rows(data, runs, start_date=None, end_date=None):
+    """Return the mask of the rows a backfill replaces: the rows of the replayed runs, within the date range if given.
+
+    Rows of runs that were not replayed, e.g. ingested before the archive existed,
+    are never replaced.
+    """
+    mask = data["ingestion_timestamp"].isin(runs)
+    if start_date is not None:
+        mask &= data["sale_date"] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= data["sale_date"] <= pd.Timestamp(end_date)
+    return mask
+
+def replay_group(worker, archive_dir, entries, bronze_config, output_dir, start_date=None, end_date=None):
+    """Re-run the bronze validation and silver transform on one group of archived sales files in a worker process.
+
+    entries maps the source file names of the group to their index entries.
+    Returns the number of rows written.
+    """
+    by_archive = {}
+    for name, entry in entries.items():
+        by_archive.setdefault(entry["archive"], []).append(name)
+    sales_data = pd.concat(
+        [read_archived_files(archive_dir, archive, names) for archive, names in sorted(by_archive.items())],
+        ignore_index=True,
+    )
+    sales_data["ingestion_timestamp"] = sales_data[SOURCE_COLUMN].map(
+        {name: entry.get("ingestion_timestamp") for name, entry in entries.items()}
+    )
+    sales_data = apply_schema(sales_data.drop(columns=[SOURCE_COLUMN]), bronze_config["schema"]["sales"], logger)
+    validate_required_columns(sales_data, bronze_config["validation"]["required_columns"]["sales"], "sales data", logger)
+    sales_data = filter_date_range(sales_data, start_date, end_date)
+    return transform_partitions(sales_data, output_dir, worker)
+
+def replay_archives(archive_dir, work_dir, index, sales_selected, bronze_config, silver_config, sharding, file_name_template, start_date=None, end_date=None):
+    """Replay the selected archived sales files across a process pool, each worker writing its own partitions.
+
+    Returns the number of rows written.
+    """
+    bronze_schema = bronze_config["schema"]
+    workers = sharding["workers"]
+
+    # Product data is small, so it is prepared once and broadcast to every worker
+    product_data = apply_schema(read_product_data(archive_dir, index, sales_selected), bronze_schema["product"], logger)
+    validate_required_columns(product_data, bronze_config["validation"]["required_columns"]["product"], "product data", logger)
+    product_data = apply_schema(product_data, silver_config["schema"]["product"], logger)
+
+    # Every worker reads its own files from the archives, balanced by row count
+    groups = balance_files(list(sales_selected), workers, size=lambda name: sales_selected[name]["rows"])
+    initargs = (product_data, bronze_config, silver_config, sharding, file_name_template, logger)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        logger.info(f"Replaying {len(sales_selected)} archived sales file(s) in {len(groups)} group(s) with {workers} worker(s).")
+        futures = [
+            pool.submit(
+                replay_group, worker, archive_dir, {name: sales_selected[name] for name in group},
+                bronze_config, work_dir, start_date, end_date,
+            )
+            for worker, group in enumerate(groups)
+        ]
+        return sum(future.result() for future in futures)
+
+def read_silver_file(file, ingestion_format, columns=None):
+    """Read a silver file, parsing the columns that decide whether a backfill replaces its rows."""
+    data = pd.read_parquet(file, columns=columns)
+    data["ingestion_timestamp"] = coerce_column(data["ingestion_timestamp"], "datetime64[ns]", ingestion_format)
+    data["sale_date"] = coerce_column(data["sale_date"], "datetime64[ns]")
+    return data
+
+def find_replaced_files(silver_dir, runs, start_date=None, end_date=None, ingestion_format=None):
+    """Return the live silver files holding rows that the backfill replaces."""
+    replaced = []
+    for file in list_live_files(silver_dir):
+        data = read_silver_file(file, ingestion_format, columns=["ingestion_timestamp", "sale_date"])
+        if replaced_rows(data, runs, start_date, end_date).any():
+            replaced.append(file)
+    return replaced
+
+def write_remainder(file, output_path, runs, start_date=None, end_date=None, ingestion_format=None):
+    """Rewrite a replaced silver file without the rows of the backfill, skipping it when nothing remains."""
+    data = read_silver_file(file, ingestion_format)
+    remainder = data[~replaced_rows(data, runs, start_date, end_date)]
+    if not remainder.empty:
+        remainder.to_parquet(output_path, index=False)
+        logger.info(f"Kept {len(remainder)} row(s) of {file} in {output_path}.")
+
+def load_backfill(con, staging_table, files, runs, start_date=None, end_date=None, backfills_table=None, backfill_id=None):
+    """Replace the backfilled rows in the staging table with a bulk load and rebuild the affected monthly tables.
+
+    The rows of the replayed ingestion runs are replaced, restricted to the
+    sale_date range when one is given. Everything happens in a single transaction,
+    which also records backfill_id in backfills_table when given.
+    Returns the number of rows deleted and inserted.
+    """
+    source = f"read_parquet({[str(file) for file in files]})" if files else None
+    con.register("backfill_runs", pd.DataFrame({"ingestion_timestamp": pd.to_datetime(list(runs))}))
+    conditions = ["ingestion_timestamp IN (SELECT ingestion_timestamp FROM backfill_runs)"]
+    if start_date is not None:
+        conditions.append(f"sale_date >= DATE '{start_date.isoformat()}'")
+    if end_date is not None:
+        conditions.append(f"sale_date <= DATE '{end_date.isoformat()}'")
+    replaced = " AND ".join(conditions)
+
+    con.begin()
+    try:
+        if backfills_table is not None:
+            record_backfill(con, backfills_table, backfill_id)
+
+        table_exists = con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [staging_table]
+        ).fetchone()[0] > 0
+        if not table_exists:
+            if source is None:
+                con.commit()
+                return 0, 0
+            con.execute(f"CREATE TABLE {staging_table} AS SELECT *, CAST(NULL AS BIGINT) AS id FROM {source} LIMIT 0")
+            con.execute(f"ALTER TABLE {staging_table} ALTER COLUMN sale_date SET DATA TYPE DATE USING CAST(sale_date AS DATE)")
+
+        year_months_query = f"SELECT DISTINCT EXTRACT(YEAR FROM sale_date), EXTRACT(MONTH FROM sale_date) FROM {staging_table} WHERE {replaced}"
+        if source is not None:
+            year_months_query += f" UNION SELECT DISTINCT EXTRACT(YEAR FROM sale_date), EXTRACT(MONTH FROM sale_date) FROM {source}"
+        year_months = con.execute(year_months_query).fetchall()
+
+        deleted = con.execute(f"DELETE FROM {staging_table} WHERE {replaced}").fetchone()[0]
+        inserted = 0
+        if source is not None:
+            max_id = con.execute(f"SELECT COALESCE(MAX(id), 0) FROM {staging_table}").fetchone()[0]
+            inserted = con.execute(f"""
+                INSERT INTO {staging_table} BY NAME
+                SELECT *, {max_id} + ROW_NUMBER() OVER () AS id FROM {source}
+            """).fetchone()[0]
+        logger.info(f"Replaced {deleted} row(s) with {inserted} row(s) in {staging_table}.")
+
+        for year, month in year_months:
+            if year is None or month is None:
+                continue
+            table_name = f"sales_{int(year)}_{int(month):02d}"
+            logger.info(f"Rebuilding table {table_name}.")
+            con.execute(f"""
+                CREATE OR REPLACE TABLE {table_name} AS
+                SELECT * FROM {staging_table}
+                WHERE EXTRACT(YEAR FROM sale_date) = {int(year)}
+                  AND EXTRACT(MONTH FROM sale_date) = {int(month)}
+            """)
+
+        create_or_update_view(con, logger)
+        con.commit()
+        return deleted, inserted
+    except Exception:
+        con.rollback()
+        logger.error("Backfill failed, rolled back the transaction.")
+        raise
+
+def run_backfill(config, bronze_config, silver_config, gold_config, start_date=None, end_date=None, from_file=None, to_file=None):
+    """Rebuild the silver data and the gold tables of a date or file range from the archives.
+
+    The replayed rows replace those of the same ingestion runs in the loaded
+    silver files and in the gold staging table. In silver, the rebuilt
+    partitions and the rewritten remainders of the replaced files are swapped
+    in through the directory manifest once the gold load has committed. The swap
+    is recorded as pending until then, and the gold load records the backfill in
+    the same transaction, so a backfill that dies in between is finished or
+    rolled back by the next backfill or gold load.
+    Returns the number of rows loaded.
+    """
+    archive_dir = bronze_config["directories"]["archive"]
+    silver_dir = config["directories"]["silver"]
+    silver_template = config["output"]["silver_file_name_template"]
+    ingestion_format = column_spec(silver_config["schema"]["sales"], "ingestion_timestamp").get("format")
+    tables = gold_config["tables"]
+    gold_input = gold_config["input"]
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    backfill_id = f"backfill_{timestamp}"
+    os.makedirs(config["directories"]["work"], exist_ok=True)
+    os.makedirs(silver_dir, exist_ok=True)
+
+    # The writer lock is held for the whole backfill: the gold load waits for it
+    # before loading and archiving new silver files, and compaction skips the directory
+    with manifest_lock(silver_dir):
+        con = duckdb.connect(database=gold_config["database"]["path"], read_only=False)
+        try:
+            resolve_backfill_swaps(con, tables["backfills"], silver_dir, logger)
+
+            index = read_index(archive_dir)
+            sales_selected = select_sales_files(index, start_date, end_date, from_file, to_file)
+            if not sales_selected:
+                logger.warning("No archived files match the requested range.")
+                return 0
+
+            # Silver files not loaded yet would be loaded again on top of the backfill
+            unloaded = list_silver_files(gold_config["directories"]["silver"], gold_input["file_format"], gold_input["success_marker"])
+            if unloaded:
+                logger.error(f"{len(unloaded)} silver file(s) are not loaded into the gold layer yet, run the gold load before backfilling.")
+                exit(1)
+
+            runs = sorted({
+                pd.to_datetime(entry["ingestion_timestamp"], format=ingestion_format)
+                for entry in sales_selected.values() if entry.get("ingestion_timestamp")
+            })
+
+            work_dir = tempfile.mkdtemp(dir=config["directories"]["work"])
+            try:
+                rows = replay_archives(
+                    archive_dir, work_dir, index, sales_selected, bronze_config, silver_config,
+                    config["sharding"], config["output"]["file_name_template"], start_date, end_date,
+                )
+
+                replaced = find_replaced_files(silver_dir, runs, start_date, end_date, ingestion_format)
+                replaced_names = [os.path.basename(file) for file in replaced]
+                partitions = sorted(f for f in os.listdir(work_dir) if f.endswith(".parquet"))
+                outputs = [silver_template.format(timestamp=timestamp, part=part) for part in range(len(partitions) + len(replaced))]
+
+                # Hide the outputs until the gold load has committed
+                begin_swap(silver_dir, outputs, backfill_id, replaced_names)
+                try:
+                    backfill_files = []
+                    for partition, output_name in zip(partitions, outputs):
+                        backfill_files.append(shutil.move(os.path.join(work_dir, partition), os.path.join(silver_dir, output_name)))
+                    for file, output_name in zip(replaced, outputs[len(partitions):]):
+                        write_remainder(file, os.path.join(silver_dir, output_name), runs, start_date, end_date, ingestion_format)
+
+                    load_backfill(con, tables["staging"], backfill_files, runs, start_date, end_date, tables["backfills"], backfill_id)
+                except Exception:
+                    abort_swap(silver_dir, outputs, backfill_id)
+                    raise
+
+                commit_swap(silver_dir, outputs, replaced_names, backfill_id)
+                logger.info(f"Replaced {len(replaced)} silver file(s) in {silver_dir} with {len(partitions)} rebuilt partition(s).")
+                return rows
+            finally:
+                shutil.rmtree(work_dir)
+        finally:
+            con.close()
+
+def parse_args():
+    """Parse the backfill range from the command line."""
+    parser = argparse.ArgumentParser(description="Rebuild silver and gold data from the archived inputs.")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First sale_date to rebuild (YYYY-MM-DD).")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last sale_date to rebuild (YYYY-MM-DD).")
+    parser.add_argument("--from-file", help="First archived source file name to replay.")
+    parser.add_argument("--to-file", help="Last archived source file name to replay.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    args = parser.parse_args()
+
+    date_range = args.start_date is not None or args.end_date is not None
+    file_range = args.from_file is not None or args.to_file is not None
+    if date_range == file_range:
+        parser.error("Give either a date range (--start-date/--end-date) or a file range (--from-file/--to-file).")
+    return args
+
+def main():
+    """Main backfill script."""
+    args = parse_args()
+
+    # Load configurations
+    config = load_config(CONFIG_PATH)
+    bronze_config = load_config(config["stage_configs"]["bronze"])
+    silver_config = load_config(config["stage_configs"]["silver"])
+    gold_config = load_config(config["stage_configs"]["gold"])
+    if args.workers:
+        config["sharding"]["workers"] = args.workers
+
+    start = time.perf_counter()
+    rows = run_backfill(
+        config, bronze_config, silver_config, gold_config,
+        args.start_date, args.end_date, args.from_file, args.to_file,
+    )
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"Backfilled {rows} rows in {elapsed:.1f} s ({rows / elapsed:.0f} rows/sec).")
+    logger.info("Backfill completed successfully.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import math
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+from datetime import datetime
+from utils.logger import get_logger
+from utils.parquet_manifest import (
+    read_manifest, write_manifest, manifest_lock, begin_swap, commit_swap, list_live_files
+)
+from utils.schema import apply_schema
+from utils.archive_store import merge_archives
+
+# Initialize logger
+logger = get_logger("b202_compact_sales_product")
+
+def load_config(config_file):
+    """Load configuration from YAML file."""
+    with open(config_file, "r") as file:
+        return yaml.safe_load(file)
+
+def remove_files(directory, names):
+    """Delete files from a directory, ignoring the ones already gone."""
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Removed file {path}.")
+
+def purge_previous_run(directory):
+    """Delete files replaced by the previous compaction and any uncommitted output.
+
+    Replaced files are kept for one run after the commit so that readers who
+    listed the directory before the swap can still open them. The outputs of
+    pending swaps, e.g. a backfill that died after its gold load, are kept
+    hidden: only the writer that knows whether they committed resolves them.
+    """
+    manifest = read_manifest(directory)
+    pending = {name for swap in manifest["pending"].values() for name in swap["outputs"]}
+    purged = [name for name in manifest["hidden"] if name not in pending] + manifest["tombstones"]
+    if not purged:
+        return
+    remove_files(directory, purged)
+    write_manifest(directory, dict(manifest, hidden=[name for name in manifest["hidden"] if name in pending], tombstones=[]))
+
+def size_tier(size, tier_base_bytes, fanout):
+    """Return the size tier of a file: tier n holds files of tier_base_bytes * fanout ** (n - 1) bytes and more."""
+    if size < tier_base_bytes:
+        return 0
+    return int(math.log(size / tier_base_bytes, fanout)) + 1
+
+def plan_batches(files, small_file_bytes, target_file_bytes, tier_base_bytes, fanout):
+    """Group small files of the same size tier into batches of roughly the target size.
+
+    A tier is only compacted once at least fanout files have built up in it, so a
+    compacted file is not rewritten with every new small file but moves up one
+    tier per merge, keeping the total rewrite work logarithmic. The tier is then
+    cut into batches of up to the target size, whatever their file count.
+    """
+    tiers = {}
+    for file in files:
+        size = os.path.getsize(file)
+        if size < small_file_bytes:
+            tiers.setdefault(size_tier(size, tier_base_bytes, fanout), []).append(file)
+
+    batches = []
+    for tier in sorted(tiers):
+        if len(tiers[tier]) < fanout:
+            continue
+        batch, batch_bytes = [], 0
+        for file in tiers[tier]:
+            batch.append(file)
+            batch_bytes += os.path.getsize(file)
+            if batch_bytes >= target_file_bytes:
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            batches.append(batch)
+    # A batch of a single file would only rewrite it
+    return [b for b in batches if len(b) > 1]
+
+def write_compacted_file(files, output_path, sort_by, schema, output_config):
+    """Merge files into a single sorted Parquet file."""
+    data = pd.concat([pd.read_parquet(file) for file in files], ignore_index=True)
+    data = apply_schema(data, schema, logger)
+    sort_columns = [col for col in sort_by if col in data.columns]
+    if sort_columns:
+        data = data.sort_values(sort_columns, kind="mergesort", ignore_index=True)
+
+    tmp_path = f"{output_path}.tmp"
+    pq.write_table(
+        pa.Table.from_pandas(data, preserve_index=False),
+        tmp_path,
+        row_group_size=output_config["row_group_size"],
+        compression=output_config["compression"],
+        compression_level=output_config["compression_level"],
+    )
+    os.replace(tmp_path, output_path)
+    logger.info(f"Compacted {len(files)} file(s) ({len(data)} rows) into {output_path}.")
+
+def compact_directory(directory, config, timestamp):
+    """Compact the small Parquet files of a directory and swap them in atomically."""
+    compaction = config["compaction"]
+    output_config = config["output"]
+
+    purge_previous_run(directory)
+
+    # Files that a pending swap replaces are left alone until it is resolved
+    pending = read_manifest(directory)["pending"]
+    replaced_by_pending = {name for swap in pending.values() for name in swap["replaced"]}
+    files = [
+        file for file in list_live_files(directory, pattern=config["file_patterns"]["input"])
+        if os.path.basename(file) not in replaced_by_pending
+    ]
+    batches = plan_batches(
+        files, compaction["small_file_bytes"], compaction["target_file_bytes"],
+        compaction["tier_base_bytes"], compaction["fanout"],
+    )
+    if not batches:
+        logger.info(f"Nothing to compact in {directory}.")
+        return
+
+    output_names = [
+        output_config["file_name_template"].format(timestamp=timestamp, part=part)
+        for part in range(len(batches))
+    ]
+
+    # Hide the outputs until every batch has been written
+    begin_swap(directory, output_names)
+
+    for batch, output_name in zip(batches, output_names):
+        write_compacted_file(batch, os.path.join(directory, output_name), compaction["sort_by"], config["schema"], output_config)
+
+    # Commit: show the outputs and hide their sources in a single manifest swap
+    replaced = [os.path.basename(file) for batch in batches for file in batch]
+    commit_swap(directory, output_names, replaced)
+    logger.info(f"Committed {len(output_names)} compacted file(s) replacing {len(replaced)} file(s) in {directory}.")
+
+def main():
+    """Main compaction script, which also merges the archive parts of past days."""
+    # Load configuration
+    config = load_config("configs/silver/b202_compact_sales_product.yml")
+
+    # Timestamp for operations
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    for directory in config["directories"]["compact"]:
+        os.makedirs(directory, exist_ok=True)
+        # Skip the directory while a backfill is swapping files in it
+        with manifest_lock(directory, blocking=False) as locked:
+            if not locked:
+                logger.warning(f"{directory} is locked by another writer, skipping.")
+                continue
+            compact_directory(directory, config, timestamp)
+
+    # Merge the archive parts written by the runs of previous days
+    for stage_config_path in config["archives"]["stage_configs"]:
+        stage_config = load_config(stage_config_path)
+        merge_archives(stage_config["directories"]["archive"], stage_config["archive"], logger)
+
+    logger.info("Compaction completed successfully.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+import shutil
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from utils.logger import get_logger
+from utils.schema import apply_schema
+from utils.archive_store import write_archive_part, commit_archive_part
+from utils.file_io import validate_file_format, read_files, concatenate_frames
+from utils.validation import validate_required_columns
+from utils.sharding import worker_state, init_worker, balance_files, transform_partitions
+
+# Initialize logger
+logger = get_logger("b203_sharded_transform_sales_product")
+
+# Configuration file path
+CONFIG_PATH = "configs/silver/b203_sharded_transform_sales_product.yml"
+
+def load_config(config_file):
+    """Load configuration from YAML file."""
+    with open(config_file, "r") as file:
+        return yaml.safe_load(file)
+
+def process_group(worker, sales_files, output_dir, archive_dir, archive_label, ingestion_timestamp, archived_at):
+    """Read, archive, validate and transform one group of sales files in a worker process.
+
+    The files are packed into their own archive part, which stays invisible until
+    the parent commits the run. Returns the number of rows written and the archive
+    part with its index entries.
+    """
+    bronze_config = worker_state["bronze_config"]
+    validation = bronze_config["validation"]
+
+    frames = read_files(sales_files, bronze_config["data_format"]["input"]["sales"])
+    archive_part = write_archive_part(
+        frames, archive_dir, "sales", bronze_config["archive"], f"{archive_label}-{worker:04d}",
+        extra={"ingestion_timestamp": ingestion_timestamp}, archived_at=archived_at,
+    )
+
+    sales_data = apply_schema(concatenate_frames(frames), bronze_config["schema"]["sales"], logger)
+    validate_required_columns(sales_data, validation["required_columns"]["sales"], "sales data", logger)
+    sales_data["ingestion_timestamp"] = ingestion_timestamp
+    return transform_partitions(sales_data, output_dir, worker), archive_part
+
+def process_files(sales_files, product_files, bronze_config, silver_config, sharding, output_dir, file_name_template, archive_dir, ingestion_timestamp, archived_at):
+    """Validate and transform the input files across a process pool, each worker writing its own partitions.
+
+    The sales files are split into groups of similar size, one per worker, and
+    every worker reads, archives and transforms its group on its own, so the
+    parent only coordinates. Returns the number of rows written, the uncommitted
+    archive parts of the sales files and the (file path, DataFrame) pairs read
+    from the product files.
+    """
+    validation = bronze_config["validation"]
+    bronze_schema = bronze_config["schema"]
+    workers = sharding["workers"]
+
+    # Product data is small, so it is prepared once and broadcast to every worker
+    product_frames = read_files(product_files, bronze_config["data_format"]["input"]["product"])
+    product_data = apply_schema(concatenate_frames(product_frames), bronze_schema["product"], logger)
+    validate_required_columns(product_data, validation["required_columns"]["product"], "product data", logger)
+    product_data["ingestion_timestamp"] = ingestion_timestamp
+    product_data = apply_schema(product_data, silver_config["schema"]["product"], logger)
+
+    groups = balance_files(sales_files, workers)
+    archive_label = archived_at.strftime("%Y%m%dT%H%M%S%f")
+    initargs = (product_data, bronze_config, silver_config, sharding, file_name_template, logger)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        logger.info(f"Processing {len(sales_files)} sales file(s) in {len(groups)} group(s) with {workers} worker(s).")
+        futures = [
+            pool.submit(process_group, worker, group, output_dir, archive_dir, archive_label, ingestion_timestamp, archived_at)
+            for worker, group in enumerate(groups)
+        ]
+        results = [future.result() for future in futures]
+    rows = sum(group_rows for group_rows, _ in results)
+    return rows, [archive_part for _, archive_part in results], product_frames
+
+def main():
+    """Main sharded transformation script."""
+    # Load configurations
+    config = load_config(CONFIG_PATH)
+    bronze_config = load_config(config["stage_configs"]["bronze"])
+    silver_config = load_config(config["stage_configs"]["silver"])
+    sharding = config["sharding"]
+    output = config["output"]
+
+    input_dir = bronze_config["directories"]["input"]
+    archive_dir = bronze_config["directories"]["archive"]
+    silver_dir = config["directories"]["silver"]
+    expected_formats = bronze_config["expected_formats"]
+
+    # Timestamps for operations
+    started_at = datetime.now()
+    timestamp = started_at.strftime("%Y-%m-%d_%H-%M-%S")
+    ingestion_timestamp = started_at.strftime("%Y-%m-%d %H-%M-%S")
+
+    # Ensure directories exist
+    os.makedirs(archive_dir, exist_ok=True)
+    os.makedirs(silver_dir, exist_ok=True)
+
+    # Check for input files
+    input_files = os.listdir(input_dir)
+    sales_files = [os.path.join(input_dir, f) for f in input_files if validate_file_format(f, expected_formats["sales"])]
+    product_files = [os.path.join(input_dir, f) for f in input_files if validate_file_format(f, expected_formats["product"])]
+
+    if not sales_files or not product_files:
+        logger.error("Missing required files: at least one sales and one product file must exist.")
+        exit(1)
+
+    # Shards are written to a temporary directory that only becomes visible once all of them succeeded
+    run_dir = os.path.join(silver_dir, output["run_dir_template"].format(timestamp=timestamp))
+    tmp_run_dir = os.path.join(silver_dir, f"_tmp_{os.path.basename(run_dir)}")
+    os.makedirs(tmp_run_dir)
+
+    try:
+        rows, archive_parts, product_frames = process_files(
+            sales_files, product_files, bronze_config, silver_config, sharding,
+            tmp_run_dir, output["file_name_template"], archive_dir, ingestion_timestamp, started_at,
+        )
+        product_part = write_archive_part(
+            product_frames, archive_dir, "product", bronze_config["archive"],
+            started_at.strftime("%Y%m%dT%H%M%S%f"), extra={"ingestion_timestamp": ingestion_timestamp}, archived_at=started_at,
+        )
+    except Exception:
+        # The input files stay in place, so the next run retries them from scratch
+        shutil.rmtree(tmp_run_dir)
+        logger.error(f"Sharded transformation failed, removed {tmp_run_dir}.")
+        raise
+
+    open(os.path.join(tmp_run_dir, output["success_marker"]), "w").close()
+    os.rename(tmp_run_dir, run_dir)
+    logger.info(f"Committed {rows} rows to {run_dir}.")
+
+    # Commit the archive parts written before the run directory, which deletes the input files
+    logger.info("Archiving processed files.")
+    for relpath, entries in archive_parts:
+        commit_archive_part(archive_dir, relpath, entries, [os.path.join(input_dir, name) for name in entries], logger)
+    commit_archive_part(archive_dir, *product_part, product_files, logger)
+
+    logger.info("Sharded transformation completed successfully.")
+
+if __name__ == "__main__":
+    main()
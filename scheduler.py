@@ -30,6 +30,10 @@ def run_etl_pipeline():
         subprocess.run(["python3", "./jobs/gold/c301_load_sales_product.py"], check=True)
         logger.info("c301_load_sales_product completed successfully.")
 
+        logger.info("Running silver compaction script...")
+        subprocess.run(["python3", "./jobs/silver/b202_compact_sales_product.py"], check=True)
+        logger.info("b202_compact_sales_product completed successfully.")
+
     except subprocess.CalledProcessError as e:
         logger.error(f"ETL pipeline script failed: {e}")
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The jobs import the project modules from the repository root, as with PYTHONPATH=/app in the image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,91 @@
+import os
+import logging
+from datetime import date, datetime
+import pandas as pd
+from utils.archive_store import archive_files, merge_archives, read_archived_files, read_index, select_files
+
+ARCHIVE_CONFIG = {
+    "file_name_template": "{dataset}_{day}.parquet",
+    "compression": "zstd",
+    "part_compression_level": 1,
+    "compression_level": 3,
+    "index_columns": {"sale_date": "datetime64[ns]", "sale_id": "Int64"},
+}
+
+logger = logging.getLogger("test_archive_store")
+
+def archive_sales(archive_dir, name, sale_dates, archived_at):
+    path = os.path.join(archive_dir, name)
+    open(path, "w").close()
+    data = pd.DataFrame({"sale_id": range(1, len(sale_dates) + 1), "sale_date": sale_dates})
+    archive_files([(path, data)], archive_dir, "sales", ARCHIVE_CONFIG, logger, archived_at=archived_at)
+
+def test_select_files_includes_files_starting_on_the_end_date():
+    index = {"files": {
+        "bronze.json": {"dataset": "sales", "sale_date_range": ["2025-10-18T00:00:00.000", "2025-10-20T00:00:00.000"]},
+        "input.json": {"dataset": "sales", "sale_date_range": ["2025-10-18", "2025-10-18"]},
+        "before.json": {"dataset": "sales", "sale_date_range": ["2025-10-01", "2025-10-09"]},
+        "after.json": {"dataset": "sales", "sale_date_range": ["2025-10-19T00:00:00", "2025-10-19T00:00:00"]},
+    }}
+
+    selected = select_files(index, "sales", "sale_date", "2025-10-10", "2025-10-18")
+
+    assert sorted(selected) == ["bronze.json", "input.json"]
+
+def test_select_files_bounds_are_inclusive_and_typed():
+    index = {"files": {
+        "a.json": {"dataset": "sales", "sale_date_range": ["2025-10-18T00:00:00", "2025-10-18T00:00:00"], "sale_id_range": [5, 9]},
+        "b.json": {"dataset": "product", "sale_date_range": None},
+    }}
+
+    assert list(select_files(index, "sales", "sale_date", date(2025, 10, 18), date(2025, 10, 18))) == ["a.json"]
+    assert list(select_files(index, "sales", "sale_date", None, datetime(2025, 10, 17, 23, 59))) == []
+    assert list(select_files(index, "sales", "sale_id", 9, 100)) == ["a.json"]
+    assert list(select_files(index, "sales", "sale_id", 10, 100)) == []
+    assert list(select_files(index, "product", "sale_date", "2030-01-01")) == ["b.json"]
+
+def test_archive_files_writes_one_part_per_run_and_merges_past_days(tmp_path):
+    archive_sales(tmp_path, "sales_1.json", ["2025-10-18", "2025-10-19"], datetime(2025, 10, 18, 10))
+    archive_sales(tmp_path, "sales_2.json", ["2025-10-20"], datetime(2025, 10, 18, 11))
+    day_dir = tmp_path / "sales" / "2025-10-18"
+    assert len([name for name in os.listdir(day_dir) if name.endswith(".parquet")]) == 2
+
+    index = read_index(tmp_path)
+    assert index["files"]["sales_1.json"]["sale_date_range"] == ["2025-10-18T00:00:00", "2025-10-19T00:00:00"]
+
+    merge_archives(tmp_path, ARCHIVE_CONFIG, logger, before=date(2025, 10, 19))
+
+    assert sorted(os.listdir(day_dir)) == ["sales_2025-10-18.index.json", "sales_2025-10-18.parquet"]
+    index = read_index(tmp_path)
+    assert {entry["archive"] for entry in index["files"].values()} == {os.path.join("sales", "2025-10-18", "sales_2025-10-18.parquet")}
+    rows = read_archived_files(tmp_path, index["files"]["sales_2.json"]["archive"], ["sales_2.json"])
+    assert rows["sale_date"].tolist() == ["2025-10-20"]
+
+def test_merge_archives_keeps_today_and_removes_uncommitted_parts(tmp_path):
+    archive_sales(tmp_path, "sales_1.json", ["2025-10-18"], datetime(2025, 10, 18, 10))
+    archive_sales(tmp_path, "sales_2.json", ["2025-10-19"], datetime(2025, 10, 19, 10))
+    pd.DataFrame({"sale_id": [1]}).to_parquet(tmp_path / "sales" / "2025-10-18" / "part-failed.parquet")
+
+    merge_archives(tmp_path, ARCHIVE_CONFIG, logger, before=date(2025, 10, 19))
+
+    assert "part-failed.parquet" not in os.listdir(tmp_path / "sales" / "2025-10-18")
+    assert len([name for name in os.listdir(tmp_path / "sales" / "2025-10-19") if name.startswith("part-")]) == 2
+    assert sorted(read_index(tmp_path)["files"]) == ["sales_1.json", "sales_2.json"]
+
+def test_archive_files_accepts_malformed_values_and_merges_disagreeing_parts(tmp_path):
+    first = os.path.join(tmp_path, "sales_1.json")
+    second = os.path.join(tmp_path, "sales_2.json")
+    open(first, "w").close()
+    open(second, "w").close()
+    malformed = pd.DataFrame({"sale_id": [1, 2], "sale_date": ["2025-10-18", "2025-10-18"], "quantity": [1, "two"]})
+    clean = pd.DataFrame({"sale_id": [3], "sale_date": ["2025-10-18"], "quantity": [4]})
+
+    archive_files([(first, malformed)], tmp_path, "sales", ARCHIVE_CONFIG, logger, archived_at=datetime(2025, 10, 18, 10))
+    archive_files([(second, clean)], tmp_path, "sales", ARCHIVE_CONFIG, logger, archived_at=datetime(2025, 10, 18, 11))
+    merge_archives(tmp_path, ARCHIVE_CONFIG, logger, before=date(2025, 10, 19))
+
+    index = read_index(tmp_path)
+    rows = read_archived_files(tmp_path, index["files"]["sales_1.json"]["archive"], ["sales_1.json", "sales_2.json"])
+    assert rows.sort_values("sale_id")["quantity"].tolist() == ["1", "two", "4"]
+    assert index["files"]["sales_1.json"]["sale_id_range"] == [1, 2]
+    assert not os.path.exists(first) and not os.path.exists(second)
@@ -0,0 +1,89 @@
+import duckdb
+import pandas as pd
+import pytest
+from datetime import date
+from jobs.gold.c302_backfill_sales_product import load_backfill, replaced_rows
+from utils.gold_tables import committed_backfills
+
+STAGING = "staging_sales_product"
+
+LEGACY_RUN = pd.Timestamp("2023-12-31 10:00:00")
+REPLAYED_RUN = pd.Timestamp("2024-01-15 10:00:00")
+
+def staging_rows(sale_dates, ingestion_timestamp, first_id):
+    return pd.DataFrame({
+        "sale_id": range(first_id, first_id + len(sale_dates)),
+        "sale_date": pd.to_datetime(sale_dates),
+        "ingestion_timestamp": ingestion_timestamp,
+        "total_sales": 10.0,
+    })
+
+def create_staging(con):
+    existing = pd.concat([
+        staging_rows(["2024-01-10", "2024-01-20", "2024-02-05"], LEGACY_RUN, 1),
+        staging_rows(["2024-01-10", "2024-01-20", "2024-02-05"], REPLAYED_RUN, 4),
+    ], ignore_index=True)
+    existing["id"] = range(1, len(existing) + 1)
+    con.register("existing", existing)
+    con.execute(f"CREATE TABLE {STAGING} AS SELECT * REPLACE (CAST(sale_date AS DATE) AS sale_date) FROM existing")
+
+def count(con, where="TRUE"):
+    return con.execute(f"SELECT COUNT(*) FROM {STAGING} WHERE {where}").fetchone()[0]
+
+def test_load_backfill_date_mode_keeps_rows_of_runs_not_replayed(tmp_path):
+    con = duckdb.connect()
+    create_staging(con)
+    rebuilt = tmp_path / "part.parquet"
+    staging_rows(["2024-01-10", "2024-01-20"], REPLAYED_RUN, 4).to_parquet(rebuilt, index=False)
+
+    deleted, inserted = load_backfill(con, STAGING, [rebuilt], [REPLAYED_RUN], date(2024, 1, 1), date(2024, 1, 31))
+
+    assert (deleted, inserted) == (2, 2)
+    assert count(con) == 6
+    assert count(con, f"ingestion_timestamp = TIMESTAMP '{LEGACY_RUN}'") == 3
+    assert con.execute("SELECT COUNT(*) FROM sales_2024_01").fetchone()[0] == 4
+    assert con.execute(f"SELECT COUNT(DISTINCT id) FROM {STAGING}").fetchone()[0] == 6
+
+def test_load_backfill_file_mode_replaces_whole_runs(tmp_path):
+    con = duckdb.connect()
+    create_staging(con)
+    rebuilt = tmp_path / "part.parquet"
+    staging_rows(["2024-01-10"], REPLAYED_RUN, 4).to_parquet(rebuilt, index=False)
+
+    deleted, inserted = load_backfill(con, STAGING, [rebuilt], [REPLAYED_RUN])
+
+    assert (deleted, inserted) == (3, 1)
+    assert count(con, f"ingestion_timestamp = TIMESTAMP '{REPLAYED_RUN}'") == 1
+    assert count(con, f"ingestion_timestamp = TIMESTAMP '{LEGACY_RUN}'") == 3
+
+def test_load_backfill_without_rebuilt_rows_only_deletes():
+    con = duckdb.connect()
+    create_staging(con)
+
+    deleted, inserted = load_backfill(con, STAGING, [], [REPLAYED_RUN], date(2024, 2, 1), date(2024, 2, 29))
+
+    assert (deleted, inserted) == (1, 0)
+    assert con.execute("SELECT COUNT(*) FROM sales_2024_02").fetchone()[0] == 1
+
+def test_replaced_rows_matches_runs_within_the_date_range():
+    data = pd.concat([
+        staging_rows(["2024-01-10", "2024-02-05"], LEGACY_RUN, 1),
+        staging_rows(["2024-01-10", "2024-02-05"], REPLAYED_RUN, 3),
+    ], ignore_index=True)
+
+    assert replaced_rows(data, [REPLAYED_RUN], date(2024, 1, 1), date(2024, 1, 31)).tolist() == [False, False, True, False]
+    assert replaced_rows(data, [REPLAYED_RUN]).tolist() == [False, False, True, True]
+
+def test_load_backfill_records_the_backfill_only_when_it_commits(tmp_path):
+    con = duckdb.connect()
+    create_staging(con)
+    rebuilt = tmp_path / "part.parquet"
+    staging_rows(["2024-01-10"], REPLAYED_RUN, 4).to_parquet(rebuilt, index=False)
+
+    with pytest.raises(duckdb.Error):
+        load_backfill(con, STAGING, [tmp_path / "missing.parquet"], [REPLAYED_RUN], backfills_table="backfill_commits", backfill_id="failed")
+    assert committed_backfills(con, "backfill_commits") == set()
+    assert count(con) == 6
+
+    load_backfill(con, STAGING, [rebuilt], [REPLAYED_RUN], backfills_table="backfill_commits", backfill_id="committed")
+    assert committed_backfills(con, "backfill_commits") == {"committed"}
@@ -0,0 +1,114 @@
+import os
+import pandas as pd
+from utils import parquet_manifest
+from utils.parquet_manifest import begin_swap, commit_swap, list_live_files, read_manifest, resolve_pending_swaps
+from jobs.silver.b202_compact_sales_product import compact_directory, plan_batches, purge_previous_run
+
+CONFIG = {
+    "file_patterns": {"input": "transformed_sales_product_"},
+    "compaction": {
+        "small_file_bytes": 1024 ** 3,
+        "target_file_bytes": 1024 ** 3,
+        "tier_base_bytes": 1024 ** 2,
+        "fanout": 3,
+        "sort_by": ["sale_date", "product_id"],
+    },
+    "schema": {"sale_id": "Int64", "product_id": "category", "sale_date": "datetime64[ns]"},
+    "output": {
+        "file_name_template": "transformed_sales_product_compacted_{timestamp}_{part:04d}.parquet",
+        "row_group_size": 1024,
+        "compression": "zstd",
+        "compression_level": 3,
+    },
+}
+
+def write_silver_file(directory, name, sale_id):
+    pd.DataFrame({
+        "sale_id": [sale_id], "product_id": ["A12"], "sale_date": ["2024-01-01"],
+    }).to_parquet(os.path.join(directory, name), index=False)
+
+def read_rows(files):
+    return sum(len(pd.read_parquet(file)) for file in files)
+
+def test_list_live_files_hides_outputs_until_commit(tmp_path):
+    write_silver_file(tmp_path, "transformed_sales_product_1.parquet", 1)
+    begin_swap(tmp_path, ["transformed_sales_product_compacted.parquet"])
+    write_silver_file(tmp_path, "transformed_sales_product_compacted.parquet", 1)
+    assert [os.path.basename(f) for f in list_live_files(tmp_path)] == ["transformed_sales_product_1.parquet"]
+
+    commit_swap(tmp_path, ["transformed_sales_product_compacted.parquet"], ["transformed_sales_product_1.parquet"])
+    assert [os.path.basename(f) for f in list_live_files(tmp_path)] == ["transformed_sales_product_compacted.parquet"]
+
+def test_pending_swaps_survive_compaction_until_resolved(tmp_path):
+    for sale_id in range(2):
+        write_silver_file(tmp_path, f"transformed_sales_product_{sale_id}.parquet", sale_id)
+    # Two backfills and a compaction died before committing their swaps
+    begin_swap(tmp_path, ["backfill_committed.parquet"], "committed", ["transformed_sales_product_0.parquet"])
+    begin_swap(tmp_path, ["backfill_failed.parquet"], "failed", ["transformed_sales_product_1.parquet"])
+    begin_swap(tmp_path, ["transformed_sales_product_compacted.parquet"])
+    for name in ["backfill_committed.parquet", "backfill_failed.parquet", "transformed_sales_product_compacted.parquet"]:
+        write_silver_file(tmp_path, name, 9)
+
+    purge_previous_run(tmp_path)
+    assert sorted(os.listdir(tmp_path)) == [
+        "_manifest.json", "backfill_committed.parquet", "backfill_failed.parquet",
+        "transformed_sales_product_0.parquet", "transformed_sales_product_1.parquet",
+    ]
+    assert read_manifest(tmp_path)["hidden"] == ["backfill_committed.parquet", "backfill_failed.parquet"]
+
+    assert resolve_pending_swaps(tmp_path, {"committed"}) == (["committed"], ["failed"])
+    assert [os.path.basename(f) for f in list_live_files(tmp_path)] == ["backfill_committed.parquet", "transformed_sales_product_1.parquet"]
+    assert not os.path.exists(tmp_path / "backfill_failed.parquet")
+    assert read_manifest(tmp_path)["pending"] == {}
+
+def test_list_live_files_during_concurrent_compaction(tmp_path, monkeypatch):
+    for sale_id in range(3):
+        write_silver_file(tmp_path, f"transformed_sales_product_{sale_id}.parquet", sale_id)
+
+    # The compaction commits between the reader's first manifest read and its directory listing
+    listdir = os.listdir
+    calls = []
+    def listdir_during_commit(path):
+        if not calls:
+            calls.append(path)
+            compact_directory(str(tmp_path), CONFIG, "2024-01-01_00-00-00")
+        return listdir(path)
+    monkeypatch.setattr(parquet_manifest.os, "listdir", listdir_during_commit)
+
+    files = list_live_files(tmp_path)
+    assert len(files) == 1
+    assert read_rows(files) == 3
+    assert read_manifest(tmp_path)["tombstones"] == [f"transformed_sales_product_{i}.parquet" for i in range(3)]
+
+def test_plan_batches_waits_for_a_full_tier(tmp_path):
+    compacted = tmp_path / "transformed_sales_product_compacted.parquet"
+    compacted.write_bytes(b"x" * 2 * 1024 ** 2)
+    small = []
+    for i in range(2):
+        path = tmp_path / f"transformed_sales_product_{i}.parquet"
+        path.write_bytes(b"x" * 1024)
+        small.append(str(path))
+
+    files = [str(compacted)] + small
+    # Two small files and one larger compacted file: no tier has three files yet
+    assert plan_batches(files, 1024 ** 3, 1024 ** 3, 1024 ** 2, 3) == []
+
+    path = tmp_path / "transformed_sales_product_2.parquet"
+    path.write_bytes(b"x" * 1024)
+    small.append(str(path))
+    # The compacted file stays out of the batch of new small files
+    assert plan_batches(files + [str(path)], 1024 ** 3, 1024 ** 3, 1024 ** 2, 3) == [small]
+
+def test_plan_batches_merges_large_files_of_a_full_tier(tmp_path):
+    # 30 files of 30 MB: each batch reaches the 256 MB target with fewer than fanout files
+    files = []
+    for i in range(30):
+        path = tmp_path / f"transformed_sales_product_{i:02d}.parquet"
+        with open(path, "wb") as f:
+            f.truncate(30 * 1024 ** 2)
+        files.append(str(path))
+
+    batches = plan_batches(files, 64 * 1024 ** 2, 256 * 1024 ** 2, 64 * 1024, 10)
+
+    assert [len(batch) for batch in batches] == [9, 9, 9, 3]
+    assert sorted(file for batch in batches for file in batch) == files
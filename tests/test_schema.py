@@ -0,0 +1,55 @@
+import os
+import logging
+import pandas as pd
+import yaml
+from utils.schema import apply_schema
+
+SCHEMA = {
+    "sale_date": "datetime64[ns]",
+    "quantity": "Int16",
+    "price": "float64",
+}
+
+def test_apply_schema_coerces_and_logs_bad_values_of_every_dtype(caplog):
+    data = pd.DataFrame({
+        "sale_date": ["2024-01-01", "not a date", "2024-01-03"],
+        "quantity": [1, "two", 70000],
+        "price": [1.5, 2.5, "n/a"],
+    })
+
+    with caplog.at_level(logging.WARNING):
+        data = apply_schema(data, SCHEMA, logging.getLogger("test_schema"))
+
+    assert data["sale_date"].isna().tolist() == [False, True, False]
+    assert data["quantity"].isna().tolist() == [False, True, True]
+    assert data["price"].isna().tolist() == [False, False, True]
+    assert str(data["quantity"].dtype) == "Int16"
+    logged = caplog.text
+    assert "'sale_date'" in logged and "'quantity'" in logged and "'price'" in logged
+
+def test_apply_schema_keeps_valid_values():
+    data = pd.DataFrame({"quantity": pd.array([3, None], dtype="Int64"), "price": [1.0, None]})
+
+    data = apply_schema(data, SCHEMA)
+
+    assert data["quantity"].tolist()[0] == 3
+    assert data["quantity"].isna().tolist() == [False, True]
+
+def test_apply_schema_enforces_the_declared_datetime_dtype():
+    data = pd.DataFrame({"sale_date": ["2024-01-01T10:00:00+02:00", "2024-01-01T09:00:00+01:00", None]})
+
+    data = apply_schema(data, {"sale_date": "datetime64[ns]"})
+
+    assert str(data["sale_date"].dtype) == "datetime64[ns]"
+    assert data["sale_date"].tolist()[:2] == [pd.Timestamp("2024-01-01 08:00:00")] * 2
+
+def test_compaction_schema_reads_text_ingestion_timestamps():
+    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "configs/silver/b202_compact_sales_product.yml")
+    with open(config_path, "r") as f:
+        schema = yaml.safe_load(f)["schema"]
+    older = pd.DataFrame({"ingestion_timestamp": ["2024-12-30 10-02-33"]})
+    newer = pd.DataFrame({"ingestion_timestamp": pd.to_datetime(["2024-12-31 10:02:33"])})
+
+    data = apply_schema(pd.concat([older, newer], ignore_index=True), schema)
+
+    assert data["ingestion_timestamp"].tolist() == [pd.Timestamp("2024-12-30 10:02:33"), pd.Timestamp("2024-12-31 10:02:33")]
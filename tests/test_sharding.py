@@ -0,0 +1,27 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.sharding import assign_shards, balance_files
+
+def test_assign_shards_spreads_missing_keys():
+    data = pd.DataFrame({"sale_date": pd.to_datetime(["2024-01-01", None, None, None, None, "2024-01-02"])})
+
+    for method in ["hash", "range"]:
+        shard_ids = assign_shards(data, "sale_date", 2, method)
+        assert sorted(np.bincount(shard_ids[data["sale_date"].isna().to_numpy()], minlength=2)) == [2, 2]
+
+def test_assign_shards_range_keeps_keys_ordered():
+    data = pd.DataFrame({"sale_date": pd.to_datetime(["2024-03-01", "2024-01-01", "2024-04-01", "2024-02-01"])})
+
+    assert assign_shards(data, "sale_date", 2, "range").tolist() == [1, 0, 1, 0]
+
+def test_balance_files_evens_out_group_sizes(tmp_path):
+    sizes = [700, 400, 300, 200, 100]
+    for i, size in enumerate(sizes):
+        (tmp_path / f"sales_{i}.json").write_bytes(b"x" * size)
+    files = [str(tmp_path / f"sales_{i}.json") for i in range(len(sizes))]
+
+    groups = balance_files(files, 2)
+
+    assert sorted(sum(os.path.getsize(f) for f in group) for group in groups) == [800, 900]
+    assert len(balance_files(files[:1], 4)) == 1
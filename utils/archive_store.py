@@ -0,0 +1,262 @@
+import os
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, datetime
+from utils.schema import coerce_column
+
+# Every archive file has an index next to it, mapping each source file packed into
+# it to its row count and the min/max of the indexed columns
+INDEX_SUFFIX = ".index.json"
+
+# Column tagging every archived row with the file it came from
+SOURCE_COLUMN = "_source_file"
+
+# Prefix of the immutable files written by each run, merged into one archive per day
+PART_PREFIX = "part-"
+
+def index_path(archive_path):
+    """Return the path of the index of an archive file."""
+    return f"{os.path.splitext(archive_path)[0]}{INDEX_SUFFIX}"
+
+def load_index_file(path):
+    """Read one index file, returning an empty index if missing."""
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def read_index(archive_dir):
+    """Merge the indexes of all the archive files under a directory.
+
+    In every day directory the merged archive is read first and the run parts
+    after it, in the order they were written, so the latest entry of a source file wins.
+    """
+    index = {"files": {}}
+    if not os.path.isdir(archive_dir):
+        return index
+    for directory, subdirectories, names in os.walk(archive_dir):
+        subdirectories.sort()
+        index_names = sorted(name for name in names if name.endswith(INDEX_SUFFIX))
+        merged = [name for name in index_names if not name.startswith(PART_PREFIX)]
+        parts = [name for name in index_names if name.startswith(PART_PREFIX)]
+        for name in merged + parts:
+            index["files"].update(load_index_file(os.path.join(directory, name))["files"])
+    return index
+
+def write_index(path, index):
+    """Atomically replace an index file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def to_archivable(data):
+    """Cast the object columns of raw input, which can mix types (e.g. 1 and "two"), to strings.
+
+    Archives keep the input as it was read, before any schema is applied, so this
+    is what lets any batch, and parts that disagree on a column's type, be written
+    to Parquet. The stages parse the values again when they replay them.
+    """
+    data = data.copy()
+    for column in data.columns:
+        if data[column].dtype == object:
+            data[column] = data[column].map(lambda value: value if pd.isna(value) else str(value)).astype("string")
+    return data
+
+def write_parquet(data, path, compression, compression_level):
+    """Atomically write a DataFrame to a Parquet file, casting mixed-type columns to strings."""
+    tmp_path = f"{path}.tmp"
+    pq.write_table(
+        pa.Table.from_pandas(to_archivable(data), preserve_index=False),
+        tmp_path,
+        compression=compression,
+        compression_level=compression_level,
+    )
+    os.replace(tmp_path, path)
+
+def to_json_value(value):
+    """Convert a pandas/numpy scalar to a JSON serializable value."""
+    if pd.isna(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    return value.item() if hasattr(value, "item") else value
+
+def column_range(data, column, dtype):
+    """Return the min and max of a column converted to dtype, or None when it is absent or empty.
+
+    Dates are converted first, so their range is stored in one ISO form whatever
+    the format of the source file.
+    """
+    if column not in data.columns:
+        return None
+    values = coerce_column(data[column], dtype).dropna()
+    if values.empty:
+        return None
+    return [to_json_value(values.min()), to_json_value(values.max())]
+
+def to_range_value(value):
+    """Parse an indexed value or a selection bound, so dates are compared as timestamps."""
+    if isinstance(value, (str, date)):
+        return pd.Timestamp(value)
+    return value
+
+def day_directory(archive_dir, dataset, day):
+    """Return the directory holding the archive files of a dataset and day."""
+    return os.path.join(archive_dir, dataset, day)
+
+def write_archive_part(frames, archive_dir, dataset, archive_config, label, extra=None, archived_at=None):
+    """Write processed files as a new immutable part of the daily archive of a dataset.
+
+    frames is a list of (file path, DataFrame) pairs holding the content of each
+    file as it was read, and label names the part, e.g. after the run writing it.
+    The part is not visible until its index is written with write_part_index.
+    Returns the path of the part relative to archive_dir and its index entries.
+    """
+    archived_at = archived_at or datetime.now()
+    day = archived_at.strftime("%Y-%m-%d")
+    directory = day_directory(archive_dir, dataset, day)
+    os.makedirs(directory, exist_ok=True)
+    archive_path = os.path.join(directory, f"{PART_PREFIX}{label}.parquet")
+
+    tagged = [df.assign(**{SOURCE_COLUMN: os.path.basename(file)}) for file, df in frames]
+    write_parquet(
+        pd.concat(tagged, ignore_index=True), archive_path,
+        archive_config["compression"], archive_config["part_compression_level"],
+    )
+
+    relpath = os.path.relpath(archive_path, archive_dir)
+    entries = {}
+    for file, df in frames:
+        entry = {
+            "dataset": dataset,
+            "archive": relpath,
+            "rows": len(df),
+            "archived_at": archived_at.isoformat(timespec="seconds"),
+        }
+        for column, dtype in archive_config["index_columns"].items():
+            entry[f"{column}_range"] = column_range(df, column, dtype)
+        entry.update(extra or {})
+        entries[os.path.basename(file)] = entry
+    return relpath, entries
+
+def write_part_index(archive_dir, relpath, entries):
+    """Make an archive part visible by writing its index."""
+    write_index(index_path(os.path.join(archive_dir, relpath)), {"files": entries})
+
+def commit_archive_part(archive_dir, relpath, entries, files, logger):
+    """Make an archive part visible and delete the source files it holds.
+
+    Stages write their parts before their own output, and commit them after it,
+    so a failure in between leaves the inputs in place without a visible part.
+    """
+    write_part_index(archive_dir, relpath, entries)
+    for file in files:
+        os.remove(file)
+        logger.info(f"Archived file {file} to {os.path.join(archive_dir, relpath)}.")
+
+def archive_files(frames, archive_dir, dataset, archive_config, logger, extra=None, archived_at=None, label=None):
+    """Pack processed files into a new part of the daily archive of a dataset and index them.
+
+    The source files are deleted once archived and indexed. extra holds additional
+    fields recorded in the index entry of every file, archived_at overrides the
+    archiving time, which defaults to now, and label the part name, which defaults
+    to the archiving time.
+    """
+    if not frames:
+        return
+    archived_at = archived_at or datetime.now()
+    label = label or archived_at.strftime("%Y%m%dT%H%M%S%f")
+    relpath, entries = write_archive_part(frames, archive_dir, dataset, archive_config, label, extra, archived_at)
+    commit_archive_part(archive_dir, relpath, entries, [file for file, _ in frames], logger)
+
+def merge_archive_day(archive_dir, dataset, day, archive_config, logger):
+    """Merge the parts of a past day into the single compressed archive of that day.
+
+    The merged archive and its index replace the previous ones atomically, and
+    the parts are deleted once the merged index no longer refers to them. Parts
+    without an index belong to a run that failed before committing, and are deleted.
+    """
+    directory = day_directory(archive_dir, dataset, day)
+    names = sorted(os.listdir(directory))
+    part_indexes = [name for name in names if name.startswith(PART_PREFIX) and name.endswith(INDEX_SUFFIX)]
+    indexed_parts = {f"{os.path.splitext(name[:-len(INDEX_SUFFIX)])[0]}.parquet" for name in part_indexes}
+    orphans = [name for name in names if name.startswith(PART_PREFIX) and name.endswith(".parquet") and name not in indexed_parts]
+
+    if part_indexes:
+        merged_path = os.path.join(directory, archive_config["file_name_template"].format(dataset=dataset, day=day))
+        entries = load_index_file(index_path(merged_path))["files"]
+        for name in part_indexes:
+            entries.update(load_index_file(os.path.join(directory, name))["files"])
+
+        by_archive = {}
+        for name, entry in entries.items():
+            by_archive.setdefault(entry["archive"], []).append(name)
+        data = pd.concat(
+            [read_archived_files(archive_dir, archive, by_archive[archive]) for archive in sorted(by_archive)],
+            ignore_index=True,
+        )
+        write_parquet(data, merged_path, archive_config["compression"], archive_config["compression_level"])
+
+        relpath = os.path.relpath(merged_path, archive_dir)
+        for entry in entries.values():
+            entry["archive"] = relpath
+        write_index(index_path(merged_path), {"files": entries})
+
+        # Indexes go first, so a part is never referenced once its file is deleted
+        for name in part_indexes:
+            os.remove(os.path.join(directory, name))
+        for name in indexed_parts:
+            os.remove(os.path.join(directory, name))
+        logger.info(f"Merged {len(part_indexes)} part(s) into {merged_path}.")
+
+    for name in orphans:
+        os.remove(os.path.join(directory, name))
+        logger.warning(f"Removed uncommitted archive part {os.path.join(directory, name)}.")
+
+def merge_archives(archive_dir, archive_config, logger, before=None):
+    """Merge the parts of every dataset and day older than before, which defaults to today."""
+    before = (before or date.today()).isoformat()
+    if not os.path.isdir(archive_dir):
+        return
+    for dataset in sorted(os.listdir(archive_dir)):
+        dataset_dir = os.path.join(archive_dir, dataset)
+        if not os.path.isdir(dataset_dir):
+            continue
+        for day in sorted(os.listdir(dataset_dir)):
+            if day < before and os.path.isdir(os.path.join(dataset_dir, day)):
+                merge_archive_day(archive_dir, dataset, day, archive_config, logger)
+
+def select_files(index, dataset, column=None, start=None, end=None, names=None):
+    """Return the index entries of a dataset whose range of a column overlaps [start, end].
+
+    Dates are parsed before being compared, so bounds can be given as dates,
+    timestamps or ISO strings of any precision. Files without a range for the
+    column are always selected. names optionally restricts the selection to a
+    set of source file names.
+    """
+    start = to_range_value(start) if start is not None else None
+    end = to_range_value(end) if end is not None else None
+    selected = {}
+    for name, entry in index["files"].items():
+        if entry["dataset"] != dataset or (names is not None and name not in names):
+            continue
+        value_range = entry.get(f"{column}_range") if column else None
+        if value_range is not None:
+            low, high = to_range_value(value_range[0]), to_range_value(value_range[1])
+            if start is not None and high < start:
+                continue
+            if end is not None and low > end:
+                continue
+        selected[name] = entry
+    return selected
+
+def read_archived_files(archive_dir, archive, names):
+    """Read the rows of the given source files from one archive file, given relative to archive_dir."""
+    return pd.read_parquet(
+        os.path.join(archive_dir, archive), filters=[(SOURCE_COLUMN, "in", list(names))]
+    )
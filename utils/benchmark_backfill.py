@@ -0,0 +1,89 @@
+import os
+import sys
+import copy
+import time
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from utils.archive_store import archive_files, merge_archives
+from jobs.gold.c302_backfill_sales_product import CONFIG_PATH, load_config, run_backfill
+
+def generate_archives(archive_dir, archive_config, days, files_per_day, rows_per_file, seed=42):
+    """Fill an archive directory with the sales and product files of several days of pipeline runs."""
+    rng = np.random.default_rng(seed)
+    logger = logging.getLogger("benchmark_backfill")
+    first_day = datetime(2024, 1, 1)
+    sale_dates = pd.date_range("2023-01-01", "2024-12-31").strftime("%Y-%m-%d").to_numpy().astype(object)
+    product_data = pd.DataFrame({
+        "product_id": ["A12", "B23", "C34"],
+        "product_name": ["Widget A", "Widget B", "Gadget C"],
+        "category": ["Widgets", "Widgets", "Gadgets"],
+        "price": [15.5, 25.0, 45.0],
+    })
+
+    for day in range(days):
+        sales_frames, product_frames, runs = [], [], []
+        for run in range(files_per_day):
+            run_time = first_day + timedelta(days=day, seconds=run * 120)
+            name = run_time.strftime("%Y%m%d_%H%M%S")
+            sales_data = pd.DataFrame({
+                "sale_id": np.arange(1, rows_per_file + 1),
+                "product_id": rng.choice(np.array(["A12", "B23", "C34", None], dtype=object), rows_per_file),
+                "sale_date": rng.choice(sale_dates, rows_per_file),
+                "quantity": rng.integers(1, 11, rows_per_file),
+                "price": rng.uniform(10.0, 50.0, rows_per_file).round(2),
+            })
+            sales_frames.append((os.path.join(archive_dir, f"sales_data_{name}.json"), sales_data))
+            product_frames.append((os.path.join(archive_dir, f"product_data_{name}.json"), product_data))
+            runs.append(run_time.strftime("%Y-%m-%d %H-%M-%S"))
+
+        # The archive deletes the files it packs, so placeholders stand in for the input files
+        for file, _ in sales_frames + product_frames:
+            open(file, "w").close()
+        archived_at = first_day + timedelta(days=day)
+        for frames, dataset in [(sales_frames, "sales"), (product_frames, "product")]:
+            for (file, df), run in zip(frames, runs):
+                archive_files([(file, df)], archive_dir, dataset, archive_config, logger,
+                              extra={"ingestion_timestamp": run}, archived_at=archived_at,
+                              label=os.path.splitext(os.path.basename(file))[0])
+
+    # Past days are merged into one archive per dataset and day, as b202 does
+    merge_archives(archive_dir, archive_config, logger)
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    files_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    rows_per_file = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    config = load_config(CONFIG_PATH)
+    bronze_config = load_config(config["stage_configs"]["bronze"])
+    silver_config = load_config(config["stage_configs"]["silver"])
+    gold_config = load_config(config["stage_configs"]["gold"])
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Point every stage at the temporary directory
+        bronze_config = copy.deepcopy(bronze_config)
+        gold_config = copy.deepcopy(gold_config)
+        bronze_config["directories"]["archive"] = os.path.join(work_dir, "archive")
+        gold_config["database"]["path"] = os.path.join(work_dir, "sales_product.duckdb")
+        config["directories"]["work"] = os.path.join(work_dir, "backfill")
+        config["directories"]["silver"] = os.path.join(work_dir, "silver")
+        gold_config["directories"]["silver"] = os.path.join(work_dir, "unloaded")
+        os.makedirs(bronze_config["directories"]["archive"])
+        os.makedirs(gold_config["directories"]["silver"])
+
+        print(f"Archiving {days} day(s) of {files_per_day} file(s) of {rows_per_file} rows.")
+        generate_archives(bronze_config["directories"]["archive"], bronze_config["archive"], days, files_per_day, rows_per_file)
+
+        start = time.perf_counter()
+        rows = run_backfill(
+            config, bronze_config, silver_config, gold_config,
+            start_date=datetime(2023, 1, 1).date(), end_date=datetime(2024, 12, 31).date(),
+        )
+        elapsed = time.perf_counter() - start
+        print(f"Backfilled {rows} rows in {elapsed:.2f} s ({rows / elapsed:.0f} rows/sec) with {config['sharding']['workers']} worker(s).")
+
+if __name__ == "__main__":
+    main()
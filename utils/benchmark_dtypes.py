@@ -0,0 +1,90 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from utils.schema import apply_schema, memory_usage_mb
+
+# Configuration file paths holding the schema of each stage
+BRONZE_CONFIG_PATH = "configs/bronze/a101_ingestion_sales_product.yml"
+SILVER_CONFIG_PATH = "configs/silver/b201_transform_sales_product.yml"
+GOLD_CONFIG_PATH = "configs/gold/c301_load_sales_product.yml"
+
+def load_config(config_file):
+    """Load configuration from YAML file."""
+    with open(config_file, "r") as file:
+        return yaml.safe_load(file)
+
+def generate_batch(rows, seed=42):
+    """Generate a sales and product batch with the dtypes pd.read_json infers."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=365).strftime("%Y-%m-%d").to_numpy()
+    sales_data = pd.DataFrame({
+        "sale_id": np.arange(1, rows + 1),
+        "product_id": rng.choice(np.array(["A12", "B23", "C34"], dtype=object), rows),
+        "sale_date": rng.choice(dates.astype(object), rows),
+        "quantity": rng.integers(1, 11, rows),
+        "price": rng.uniform(10.0, 50.0, rows).round(2),
+        "ingestion_timestamp": "2024-12-31 12-00-00",
+    })
+    product_data = pd.DataFrame({
+        "product_id": ["A12", "B23", "C34"],
+        "product_name": ["Widget A", "Widget B", "Gadget C"],
+        "category": ["Widgets", "Widgets", "Gadgets"],
+        "price": [15.5, 25.0, 45.0],
+    })
+    return sales_data, product_data
+
+def transform(sales_data, product_data):
+    """Join and aggregate the batch the way the silver and gold stages do."""
+    sales_data = sales_data.rename(columns={"price": "sales_price"})
+    product_data = product_data.rename(columns={"price": "product_price"})
+    if isinstance(sales_data["product_id"].dtype, pd.CategoricalDtype):
+        product_data["product_id"] = product_data["product_id"].astype(sales_data["product_id"].dtype)
+
+    start = time.perf_counter()
+    merged_data = pd.merge(sales_data, product_data, on="product_id", how="left")
+    merge_seconds = time.perf_counter() - start
+
+    merged_data["total_sales"] = merged_data["quantity"] * merged_data["product_price"]
+
+    start = time.perf_counter()
+    merged_data.groupby(["product_id", "category"], observed=True)["total_sales"].sum()
+    groupby_seconds = time.perf_counter() - start
+    return merged_data, merge_seconds, groupby_seconds
+
+def report(stage, inferred, typed):
+    """Print the memory footprint of a stage before and after the schema is applied."""
+    before = memory_usage_mb(inferred)
+    after = memory_usage_mb(typed)
+    print(f"{stage:<8} inferred: {before:9.2f} MB  schema: {after:9.2f} MB  reduction: {before / after:5.1f}x")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    bronze_schema = load_config(BRONZE_CONFIG_PATH)["schema"]
+    silver_schema = load_config(SILVER_CONFIG_PATH)["schema"]
+    gold_schema = load_config(GOLD_CONFIG_PATH)["schema"]
+
+    print(f"Benchmarking a sales batch of {rows} rows.")
+    sales_data, product_data = generate_batch(rows)
+
+    # Bronze: input files as read by a101
+    bronze_sales = sales_data.drop(columns=["ingestion_timestamp"])
+    report("bronze", bronze_sales, apply_schema(bronze_sales.copy(), bronze_schema["sales"]))
+
+    # Silver: bronze files as read by b201, then joined
+    silver_sales = apply_schema(sales_data.copy(), silver_schema["sales"])
+    silver_product = apply_schema(product_data.copy(), silver_schema["product"])
+    report("silver", sales_data, silver_sales)
+
+    inferred_merged, inferred_merge_s, inferred_groupby_s = transform(sales_data, product_data)
+    typed_merged, typed_merge_s, typed_groupby_s = transform(silver_sales, silver_product)
+    report("merged", inferred_merged, typed_merged)
+    print(f"{'merge':<8} inferred: {inferred_merge_s:9.3f} s   schema: {typed_merge_s:9.3f} s")
+    print(f"{'groupby':<8} inferred: {inferred_groupby_s:9.3f} s   schema: {typed_groupby_s:9.3f} s")
+
+    # Gold: silver files as read by c301
+    report("gold", inferred_merged, apply_schema(typed_merged.copy(), gold_schema))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from jobs.silver.b203_sharded_transform_sales_product import CONFIG_PATH, load_config, process_files
+
+# Worker counts to benchmark
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+
+def generate_input_files(input_dir, files, rows_per_file):
+    """Write sales and product input files shaped like the data generator output."""
+    start_date = date(2024, 1, 1)
+    sales_files = []
+    for i in range(files):
+        sales_data = [
+            {
+                "sale_id": i * rows_per_file + j,
+                "product_id": random.choice(["A12", "B23", "C34", None]),
+                "sale_date": str(start_date + timedelta(days=random.randint(0, 365))) if random.random() > 0.1 else None,
+                "quantity": random.randint(1, 10),
+                "price": round(random.uniform(10.0, 50.0), 2),
+            }
+            for j in range(rows_per_file)
+        ]
+        path = os.path.join(input_dir, f"sales_data_{i:05d}.json")
+        with open(path, "w") as f:
+            json.dump(sales_data, f)
+        sales_files.append(path)
+
+    product_data = [
+        {"product_id": "A12", "product_name": "Widget A", "category": "Widgets", "price": 15.5},
+        {"product_id": "B23", "product_name": "Widget B", "category": "Widgets", "price": 25.0},
+        {"product_id": "C34", "product_name": "Gadget C", "category": "Gadgets", "price": 45.0},
+    ]
+    product_file = os.path.join(input_dir, "product_data_00000.json")
+    with open(product_file, "w") as f:
+        json.dump(product_data, f)
+    return sales_files, [product_file]
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rows_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    config = load_config(CONFIG_PATH)
+    bronze_config = load_config(config["stage_configs"]["bronze"])
+    silver_config = load_config(config["stage_configs"]["silver"])
+
+    with tempfile.TemporaryDirectory() as input_dir:
+        print(f"Generating {files} sales file(s) of {rows_per_file} rows.")
+        sales_files, product_files = generate_input_files(input_dir, files, rows_per_file)
+        rows = files * rows_per_file
+
+        baseline = None
+        for workers in WORKER_COUNTS:
+            sharding = dict(config["sharding"], workers=workers)
+            with tempfile.TemporaryDirectory() as output_dir, tempfile.TemporaryDirectory() as archive_dir:
+                start = time.perf_counter()
+                process_files(
+                    sales_files, product_files, bronze_config, silver_config, sharding,
+                    output_dir, config["output"]["file_name_template"], archive_dir,
+                    datetime.now().strftime("%Y-%m-%d %H-%M-%S"), datetime.now(),
+                )
+                elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers: {workers:>2}  time: {elapsed:8.2f} s  rows/sec: {rows / elapsed:12.0f}  speedup: {baseline / elapsed:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import pandas as pd
+
+def validate_file_format(file_name, expected_pattern):
+    """Validate if a file matches the expected pattern."""
+    return file_name.startswith(expected_pattern.split("*")[0]) and file_name.endswith(".json")
+
+def read_file(file_path, file_format):
+    """Read a file in the specified format."""
+    if file_format == "json":
+        return pd.read_json(file_path)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+def read_files(file_paths, file_format):
+    """Read multiple files, keeping track of the file each DataFrame came from."""
+    return [(file_path, read_file(file_path, file_format)) for file_path in file_paths]
+
+def concatenate_frames(frames):
+    """Concatenate the DataFrames read from multiple files into a single DataFrame."""
+    return pd.concat([df for _, df in frames], ignore_index=True)
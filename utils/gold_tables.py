@@ -0,0 +1,62 @@
+import os
+from utils.parquet_manifest import resolve_pending_swaps
+
+def list_silver_files(silver_dir, file_format, success_marker):
+    """List the silver files to load, including the partitions of committed sharded runs."""
+    files = []
+    for entry in sorted(os.listdir(silver_dir)):
+        path = os.path.join(silver_dir, entry)
+        if os.path.isfile(path) and entry.endswith(file_format):
+            files.append(path)
+        elif os.path.isdir(path) and os.path.exists(os.path.join(path, success_marker)):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(file_format))
+    return files
+
+def record_backfill(con, table_name, backfill_id):
+    """Record a backfill in the gold layer, inside the transaction that loads it."""
+    con.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (backfill_id VARCHAR, committed_at TIMESTAMP)")
+    con.execute(f"INSERT INTO {table_name} VALUES (?, CURRENT_TIMESTAMP)", [backfill_id])
+
+def committed_backfills(con, table_name):
+    """Return the ids of the backfills whose gold load committed."""
+    table_exists = con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table_name]
+    ).fetchone()[0] > 0
+    if not table_exists:
+        return set()
+    return {row[0] for row in con.execute(f"SELECT backfill_id FROM {table_name}").fetchall()}
+
+def resolve_backfill_swaps(con, table_name, directory, logger):
+    """Finish the silver swaps of the backfills whose gold load committed and roll back the others.
+
+    A backfill that dies between its gold load and its silver swap leaves the
+    swap pending in the manifest of directory. Must be called with the writer
+    lock of directory held.
+    """
+    finished, rolled_back = resolve_pending_swaps(directory, committed_backfills(con, table_name))
+    for backfill_id in finished:
+        logger.warning(f"Finished the silver swap of backfill {backfill_id}, whose gold load had committed.")
+    for backfill_id in rolled_back:
+        logger.warning(f"Rolled back the silver swap of backfill {backfill_id}, whose gold load had not committed.")
+
+def create_or_update_view(con, logger):
+    """Create or update a view for the year 2024."""
+    logger.info("Creating or updating view for the year 2024.")
+    # Collect all table names for 2024
+    tables_2024 = con.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_name LIKE 'sales_2024_%'
+    """).fetchall()
+
+    # Construct the query to join all 2024 tables
+    if tables_2024:
+        union_query = " UNION ALL ".join([f"SELECT * FROM {table[0]}" for table in tables_2024])
+
+        # Create or replace the view
+        con.execute(f"""
+            CREATE OR REPLACE VIEW vw_sales_2024 AS
+            {union_query}
+        """)
+        logger.info("View vw_sales_2024 created or updated successfully.")
+    else:
+        logger.warning("No tables found for the year 2024 to create the view.")
@@ -0,0 +1,130 @@
+import os
+import json
+import fcntl
+from contextlib import contextmanager
+
+# Manifest kept next to the Parquet files of a directory. Files listed under
+# "hidden" are being written and are not visible yet; files listed under
+# "tombstones" have been replaced by a rewritten file and wait to be deleted.
+# "pending" records, by swap id, the swaps whose commit depends on another
+# system (e.g. a backfill committing the gold layer first), so they can be
+# finished or rolled back after a crash. "version" is bumped on every write so
+# readers can detect a concurrent swap.
+MANIFEST_NAME = "_manifest.json"
+
+# Lock file serializing the writers of a manifest (compaction, backfill)
+LOCK_NAME = "_manifest.lock"
+
+def manifest_path(directory):
+    """Return the path of the manifest for a directory."""
+    return os.path.join(directory, MANIFEST_NAME)
+
+def read_manifest(directory):
+    """Read the manifest of a directory, returning an empty one if missing."""
+    path = manifest_path(directory)
+    if not os.path.exists(path):
+        return {"version": 0, "hidden": [], "tombstones": [], "pending": {}}
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    manifest.setdefault("version", 0)
+    manifest.setdefault("hidden", [])
+    manifest.setdefault("tombstones", [])
+    manifest.setdefault("pending", {})
+    return manifest
+
+def write_manifest(directory, manifest):
+    """Atomically replace the manifest of a directory, bumping its version."""
+    manifest = dict(manifest, version=read_manifest(directory)["version"] + 1)
+    path = manifest_path(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+@contextmanager
+def manifest_lock(directory, blocking=True):
+    """Hold the exclusive writer lock of a directory's manifest.
+
+    Yields False without waiting when blocking is False and another writer
+    holds the lock.
+    """
+    with open(os.path.join(directory, LOCK_NAME), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def begin_swap(directory, outputs, swap_id=None, replaced=None):
+    """Hide files that are about to be written until the swap is committed.
+
+    When a swap_id is given, the swap is also recorded as pending with the files
+    it replaces, so resolve_pending_swaps can finish or roll it back if the
+    writer dies before committing or aborting it.
+    """
+    manifest = read_manifest(directory)
+    manifest["hidden"] = manifest["hidden"] + [name for name in outputs if name not in manifest["hidden"]]
+    if swap_id is not None:
+        manifest["pending"][swap_id] = {"outputs": list(outputs), "replaced": list(replaced or [])}
+    write_manifest(directory, manifest)
+
+def commit_swap(directory, outputs, replaced, swap_id=None):
+    """Show the written files and hide the files they replace in a single manifest write."""
+    manifest = read_manifest(directory)
+    manifest["hidden"] = [name for name in manifest["hidden"] if name not in outputs]
+    manifest["tombstones"] = manifest["tombstones"] + [name for name in replaced if name not in manifest["tombstones"]]
+    manifest["pending"].pop(swap_id, None)
+    write_manifest(directory, manifest)
+
+def abort_swap(directory, outputs, swap_id=None):
+    """Delete the files of a swap that will not be committed and stop hiding them."""
+    for name in outputs:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+    manifest = read_manifest(directory)
+    manifest["hidden"] = [name for name in manifest["hidden"] if name not in outputs]
+    manifest["pending"].pop(swap_id, None)
+    write_manifest(directory, manifest)
+
+def resolve_pending_swaps(directory, committed):
+    """Finish the pending swaps whose id is in committed and roll back the others.
+
+    Must be called with the writer lock held, by a writer that knows which swaps
+    were committed on the other side. Returns the ids of the committed and of
+    the rolled back swaps.
+    """
+    finished, rolled_back = [], []
+    for swap_id, swap in read_manifest(directory)["pending"].items():
+        if swap_id in committed:
+            commit_swap(directory, swap["outputs"], swap["replaced"], swap_id)
+            finished.append(swap_id)
+        else:
+            abort_swap(directory, swap["outputs"], swap_id)
+            rolled_back.append(swap_id)
+    return finished, rolled_back
+
+def list_live_files(directory, suffix=".parquet", pattern=None):
+    """List the files of a directory that are visible to readers.
+
+    The directory is listed between two reads of the manifest, and the listing is
+    retried when the manifest changed in between, so a swap that commits
+    concurrently is seen either entirely or not at all. Replaced files are only
+    deleted on the next compaction run, so the returned files can still be read.
+    """
+    while True:
+        manifest = read_manifest(directory)
+        names = os.listdir(directory)
+        if read_manifest(directory)["version"] == manifest["version"]:
+            break
+    excluded = set(manifest["hidden"]) | set(manifest["tombstones"])
+    return sorted(
+        os.path.join(directory, f) for f in names
+        if f.endswith(suffix) and f not in excluded and (pattern is None or pattern in f)
+    )
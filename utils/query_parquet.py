@@ -1,9 +1,9 @@
-import os
 import pandas as pd
+from utils.parquet_manifest import list_live_files
 
 def load_parquet_files(directory, file_pattern):
     """Load and concatenate Parquet files from a directory."""
-    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.parquet') and file_pattern in f]
+    files = list_live_files(directory, pattern=file_pattern)
     if not files:
         print("No Parquet files found in the specified directory.")
         return pd.DataFrame()
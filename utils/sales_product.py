@@ -0,0 +1,71 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+from utils.validation import validate_dataframe_format, log_and_drop_invalid_rows
+
+def align_categories(left, right, column):
+    """Give a categorical column the same categories in both DataFrames so merges on it stay categorical."""
+    if isinstance(left[column].dtype, pd.CategoricalDtype) and isinstance(right[column].dtype, pd.CategoricalDtype):
+        categories = union_categoricals([left[column], right[column]], ignore_order=True).categories
+        left[column] = left[column].cat.set_categories(categories)
+        right[column] = right[column].cat.set_categories(categories)
+    return left, right
+
+def transform_sales_product(sales_data, product_data, config, logger):
+    """Validate and clean the sales and product data, then join them into the silver format."""
+    # Extract validation settings
+    expected_sales_columns = config["expected_columns"]["sales"]
+    expected_product_columns = config["expected_columns"]["product"]
+    drop_missing_columns = config["validation"]["drop_missing"]
+    check_negative_columns = config["validation"]["check_negative"]
+
+    # Validate data format
+    validate_dataframe_format(sales_data, expected_sales_columns, "Sales Data", logger)
+    validate_dataframe_format(product_data, expected_product_columns, "Product Data", logger)
+
+    # Clean sales data: Remove rows with missing values
+    sales_data = log_and_drop_invalid_rows(
+        sales_data, sales_data[drop_missing_columns].isnull().any(axis=1), f"missing or invalid {' or '.join(drop_missing_columns)}", logger
+    )
+
+    # Rename price columns to avoid conflicts
+    sales_data.rename(columns={"price": "sales_price"}, inplace=True)
+    product_data.rename(columns={"price": "product_price"}, inplace=True)
+
+    # Drop duplicate ingestion_timestamp column from product_data
+    if 'ingestion_timestamp' in product_data.columns:
+        product_data.drop(columns=['ingestion_timestamp'], inplace=True)
+    
+    # Join sales and product data
+    logger.info("Joining sales and product data.")
+    sales_data, product_data = align_categories(sales_data, product_data, "product_id")
+    merged_data = pd.merge(sales_data, product_data, on="product_id", how="left")
+    logger.debug(f"Merged data columns: {merged_data.columns}")
+
+    # Add total_sales column
+    logger.info("Adding total_sales column.")
+    merged_data["total_sales"] = merged_data["quantity"] * merged_data["product_price"]
+
+    # Perform validations after adding total_sales
+    # 1. Ensure no sale_id is missing
+    merged_data = log_and_drop_invalid_rows(
+        merged_data, merged_data['sale_id'].isnull(), "missing sale_id", logger
+    )
+
+    # 2. Check for negative values in quantity and sales_price
+    merged_data = log_and_drop_invalid_rows(
+        merged_data, (merged_data['quantity'] < 0) | (merged_data['sales_price'] < 0), "negative values in quantity or sales_price", logger
+    )
+
+    # 3. Verify unique product_id counts
+    unique_product_ids_bronze = product_data['product_id'].nunique()
+    unique_product_ids_merged = merged_data['product_id'].nunique()
+    if unique_product_ids_bronze != unique_product_ids_merged:
+        logger.warning(f"Mismatch in unique product_id counts: Bronze Product Data = {unique_product_ids_bronze}, Merged Data = {unique_product_ids_merged}")
+
+    # 4. Validate total_sales calculation
+    incorrect_total_sales = merged_data[merged_data["total_sales"] != merged_data["quantity"] * merged_data["product_price"]]
+    if not incorrect_total_sales.empty:
+        logger.warning(f"Incorrect total_sales calculation for rows:\n{incorrect_total_sales}")
+        merged_data = merged_data.drop(incorrect_total_sales.index)
+
+    return merged_data
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype, is_float_dtype, pandas_dtype
+
+def coerce_column(values, dtype, date_format=None):
+    """Convert a column to a dtype, turning the values that do not fit into missing values."""
+    if dtype.startswith("datetime64"):
+        # Parsed as UTC so mixed offsets do not fail, then stored naive in the declared unit
+        parsed = pd.to_datetime(values, format=date_format, errors="coerce", utc=True)
+        return parsed.dt.tz_convert(None).astype(dtype)
+
+    target = pandas_dtype(dtype)
+    if is_integer_dtype(target) or is_float_dtype(target):
+        numeric = pd.to_numeric(values, errors="coerce")
+        if is_integer_dtype(target):
+            info = np.iinfo(getattr(target, "numpy_dtype", target))
+            if not is_integer_dtype(numeric.dtype):
+                numeric = numeric.astype("float64")
+                numeric = numeric.mask(numeric % 1 != 0)
+            numeric = numeric.mask(((numeric < info.min) | (numeric > info.max)).fillna(False))
+        return numeric.astype(target)
+    return values.astype(target)
+
+def column_spec(schema, column):
+    """Return the schema entry of a column as a mapping, whether it is declared as a dtype string or a mapping."""
+    spec = schema[column]
+    return {"dtype": spec} if isinstance(spec, str) else spec
+
+def apply_schema(data, schema, logger=None):
+    """Cast the columns of a DataFrame to the dtypes declared in a config schema.
+
+    Each entry maps a column to a pandas dtype string (e.g. "category", "Int16",
+    "string[pyarrow]") or to a mapping with a "dtype" key. Datetime columns accept
+    an optional "format". Values that cannot be represented in the column dtype
+    (unparsable dates, non-integer or out of range numbers) become missing, and the
+    affected rows are logged. Columns absent from the DataFrame are skipped so the
+    stage validations can report them.
+    """
+    for column in schema:
+        if column not in data.columns:
+            continue
+        spec = column_spec(schema, column)
+        converted = coerce_column(data[column], spec["dtype"], spec.get("format"))
+        invalid = data[column].notna() & converted.isna()
+        if logger is not None and invalid.any():
+            logger.warning(
+                f"Invalid values in column '{column}' for dtype {spec['dtype']} set to missing:\n{data.loc[invalid, column]}"
+            )
+        data[column] = converted
+    return data
+
+def memory_usage_mb(data):
+    """Return the deep memory footprint of a DataFrame in megabytes."""
+    return data.memory_usage(deep=True).sum() / 1024 ** 2
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.schema import apply_schema
+from utils.sales_product import transform_sales_product
+
+# Product data, stage configs and logger broadcast to every worker process by init_worker
+worker_state = {}
+
+def init_worker(product_data, bronze_config, silver_config, sharding, file_name_template, logger):
+    """Keep the broadcast product data, settings and the logger of the job in the worker process."""
+    worker_state["product_data"] = product_data
+    worker_state["bronze_config"] = bronze_config
+    worker_state["silver_config"] = silver_config
+    worker_state["sharding"] = sharding
+    worker_state["file_name_template"] = file_name_template
+    worker_state["logger"] = logger
+
+def balance_files(file_paths, groups, size=os.path.getsize):
+    """Split files into at most groups lists of roughly equal total size, placing the largest files first."""
+    buckets = [[] for _ in range(groups)]
+    totals = [0] * groups
+    for path in sorted(file_paths, key=size, reverse=True):
+        smallest = totals.index(min(totals))
+        buckets[smallest].append(path)
+        totals[smallest] += size(path)
+    return [bucket for bucket in buckets if bucket]
+
+def assign_shards(data, column, shards, method):
+    """Return the shard of every row, hash- or range-partitioning on a column.
+
+    Rows without a value in the column are spread round-robin over the shards,
+    instead of all landing in the same one.
+    """
+    keys = data[column]
+    missing = keys.isna().to_numpy()
+    if method == "hash":
+        shard_ids = (pd.util.hash_pandas_object(keys, index=False).to_numpy() % shards).astype(int)
+    elif method == "range":
+        ranks = keys.rank(method="first").to_numpy()
+        shard_ids = np.zeros(len(data), dtype=int)
+        present = len(data) - missing.sum()
+        shard_ids[~missing] = ((ranks[~missing] - 1) * shards // max(present, 1)).astype(int)
+    else:
+        raise ValueError(f"Unsupported partition method: {method}")
+    shard_ids[missing] = np.arange(missing.sum()) % shards
+    return shard_ids
+
+def transform_partitions(sales_data, output_dir, worker):
+    """Run the silver transform on the rows of one worker and write them as Parquet partitions.
+
+    The rows are split into sharding["partitions"] files on the partition column,
+    so each file covers a narrow range of it. Returns the number of rows written.
+    """
+    silver_config = worker_state["silver_config"]
+    sharding = worker_state["sharding"]
+    logger = worker_state["logger"]
+    sales_data = apply_schema(sales_data, silver_config["schema"]["sales"], logger)
+    product_data = worker_state["product_data"].copy()
+    merged_data = transform_sales_product(sales_data, product_data, silver_config, logger)
+
+    partition_ids = assign_shards(merged_data, sharding["partition_by"], sharding["partitions"], sharding["method"])
+    for partition in np.unique(partition_ids):
+        output_name = worker_state["file_name_template"].format(worker=worker, partition=partition)
+        merged_data[partition_ids == partition].to_parquet(os.path.join(output_dir, output_name), index=False)
+    return len(merged_data)
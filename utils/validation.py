@@ -0,0 +1,23 @@
+def validate_required_columns(data, required_columns, dataset_name, logger):
+    """Validate that all required columns are present in the dataset."""
+    missing_columns = [col for col in required_columns if col not in data.columns]
+    if missing_columns:
+        logger.error(f"Missing columns in {dataset_name}: {missing_columns}")
+        raise ValueError(f"Missing columns in {dataset_name}: {missing_columns}")
+    logger.info(f"All required columns present in {dataset_name}.")
+
+def validate_dataframe_format(data, expected_columns, dataframe_name, logger):
+    """Validate that a DataFrame has the expected columns."""
+    missing_columns = set(expected_columns) - set(data.columns)
+    if missing_columns:
+        logger.error(f"{dataframe_name} is missing columns: {missing_columns}. Exiting.")
+        exit(1)
+    logger.info(f"{dataframe_name} has the expected format.")
+
+def log_and_drop_invalid_rows(data, condition, description, logger):
+    """Log and drop rows based on a condition."""
+    invalid_rows = data[condition]
+    if not invalid_rows.empty:
+        logger.warning(f"Dropping rows where {description}:\n{invalid_rows}")
+        data = data.drop(invalid_rows.index)
+    return data